@@ -3,13 +3,28 @@ Database module initialization
 Exports all necessary database components
 """
 
-from .database import SessionLocal, get_db, engine, Base, init_database, test_connection
+from .database import (
+    SessionLocal,
+    get_db,
+    get_ro_db,
+    engine,
+    Base,
+    init_database,
+    test_connection,
+    warm_up_pool,
+    pool_status,
+    json_dumps,
+)
 
 __all__ = [
     "SessionLocal",
     "get_db",
+    "get_ro_db",
     "engine",
     "Base",
     "init_database",
     "test_connection",
+    "warm_up_pool",
+    "pool_status",
+    "json_dumps",
 ]
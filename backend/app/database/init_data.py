@@ -3,9 +3,11 @@ Database initialization with default data (Async Version)
 """
 
 import logging
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.acl_models import (
+    ACLConfig,
     create_default_roles,
     create_default_acl_users,
     create_default_acl_config,
@@ -22,6 +24,14 @@ logger = logging.getLogger(__name__)
 
 async def create_default_data(db: AsyncSession):
     """Create default data for a fresh database (async)"""
+    # Skip seeding entirely once a previous run has completed it
+    result = await db.execute(
+        select(ACLConfig.id).where(ACLConfig.key == "initialized")
+    )
+    if result.scalar_one_or_none() is not None:
+        logger.info("Default data already present, skipping")
+        return
+
     logger.info("Creating default data...")
 
     try:
@@ -37,11 +47,19 @@ async def create_default_data(db: AsyncSession):
         await create_default_sensor_types(db)
         await create_default_sensors(db)
         await create_default_ss_config(db)
+
+        db.add(
+            ACLConfig(
+                key="initialized",
+                value="1",
+                description="Default data has been created",
+            )
+        )
         await db.commit()
 
         logger.info("Default data created successfully!")
 
     except Exception as e:
-        logger.error(f"Error creating default data: {e}")
+        logger.error("Error creating default data: %s", e)
         await db.rollback()
         raise
@@ -2,17 +2,25 @@
 Smart Factory Backend - Main Application Entry Point
 """
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
+from typing import Optional
 import uvicorn
 import logging
 import asyncio
-import os
-from pathlib import Path
-
-from app.database.database import init_database, test_connection
-from app.database import get_db
+import inspect
+import time
+import orjson
+
+from app.database.database import (
+    init_database,
+    pool_status,
+    test_connection,
+    warm_up_pool,
+)
+from app.database import get_ro_db, SessionLocal
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.mqtt.emqx_auth import init_emqx_auth_manager, get_emqx_auth_manager
 from app.mqtt.client import init_mqtt_client, get_mqtt_client
@@ -20,21 +28,82 @@ from app.mqtt.user_client import init_user_mqtt_manager, get_user_mqtt_manager
 from app.websocket.manager import get_websocket_manager
 from app.managers.db_acl_manager import init_acl_manager, get_acl_manager
 from app.managers.db_ss_manager import init_ss_manager, get_ss_manager
-from app.managers.db_auth_manager import init_auth_manager, get_auth_manager
+from app.managers.db_auth_manager import init_auth_manager
+from app.managers.db_mqtt_manager import (
+    start_last_seen_writer,
+    stop_last_seen_writer,
+)
 from app.routes import websocket_router
-from app.config import settings
+from app.config import get_settings
 from app.routes import acl_router, mqtt_router, ss_router, auth_router
 
+settings = get_settings()
+
 # Configure logging
 logging.basicConfig(
-    level=getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper()),
+    level=getattr(logging, settings.LOG_LEVEL.upper()),
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
+# The log format never uses thread/process fields, skip collecting them
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
 logger = logging.getLogger(__name__)
 
+# Pre-rendered JSON for the status endpoints, refreshed in the background
+STATUS_REFRESH_INTERVAL = 5.0
+_cached_root_bytes: Optional[bytes] = None
+_cached_health_bytes: Optional[bytes] = None
+_cached_at = 0.0  # When the cached payloads were rendered (monotonic seconds)
+
+
+async def _step(name: str, step, reraise: bool = False):
+    """Run one startup step (awaitable or plain callable) and log its outcome"""
+    try:
+        result = await step if inspect.isawaitable(step) else step()
+        logger.info("✅ %s initialized", name)
+        return result
+    except Exception as e:
+        logger.error("❌ Failed to initialize %s: %s", name, e)
+        if reraise:
+            raise
+        return None
+
+
+async def _start_mqtt_client(settings):
+    """Create the shared MQTT client and connect it without blocking the loop"""
+    mqtt = init_mqtt_client(
+        broker_host=settings.MQTT_BROKER_HOST,
+        broker_port=settings.MQTT_BROKER_PORT,
+        username=settings.MQTT_USERNAME,
+        password=settings.MQTT_PASSWORD,
+        qos=1,
+        tls_enabled=settings.MQTT_TLS_ENABLED,
+        ca_certs=settings.MQTT_CA_CERTS if settings.MQTT_CA_CERTS else None,
+    )
+    mqtt.set_websocket_manager(get_websocket_manager())
+    await asyncio.to_thread(mqtt.connect)
+    return mqtt
+
+
+def _start_user_mqtt_manager(settings, main_loop):
+    """Create the per-user MQTT manager bound to the main event loop"""
+    user_mqtt_mgr = init_user_mqtt_manager(
+        broker_host=settings.MQTT_BROKER_HOST,
+        broker_port=settings.MQTT_BROKER_PORT,
+        username=settings.MQTT_USERNAME,
+        password=settings.MQTT_PASSWORD,
+        qos=1,
+        tls_enabled=settings.MQTT_TLS_ENABLED,
+        ca_certs=settings.MQTT_CA_CERTS if settings.MQTT_CA_CERTS else None,
+    )
+    user_mqtt_mgr.set_main_loop(main_loop)
+    return user_mqtt_mgr
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    settings = get_settings()
 
     # Test database connection
     if not await test_connection():
@@ -42,88 +111,49 @@ async def lifespan(app: FastAPI):
         raise Exception("Database connection failed")
 
     # Initialize database
-    try:
-        await init_database()
-        logger.info("✅ Database initialized successfully")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize database: {e}")
-        raise
+    await _step("Database", init_database(), reraise=True)
 
     # Get main event loop
     main_loop = asyncio.get_running_loop()
 
-    # Initialize Auth Manager
-    try:
-        auth_mgr = init_auth_manager()
-        logger.info("✅ Authentication manager initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize Auth manager: {e}")
-
-    # Initialize ACL Manager
-    try:
-        acl_mgr = await init_acl_manager()
-        logger.info("✅ Database-backed ACL manager initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize ACL manager: {e}")
-
-    # Initialize SS Manager
-    try:
-        ss_mgr = await init_ss_manager()
-        logger.info("✅ Database-backed SS manager initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize SS manager: {e}")
-
-    # Initialize MQTT clients
-    ws_manager = get_websocket_manager()
-    try:
-        mqtt = init_mqtt_client(
-            broker_host=settings.MQTT_BROKER_HOST,
-            broker_port=settings.MQTT_BROKER_PORT,
-            username=settings.MQTT_USERNAME,
-            password=settings.MQTT_PASSWORD,
-            qos=1,
-            tls_enabled=settings.MQTT_TLS_ENABLED,
-            ca_certs=settings.MQTT_CA_CERTS if settings.MQTT_CA_CERTS else None,
-        )
-        mqtt.set_websocket_manager(ws_manager)
-        mqtt.connect()
-        logger.info("✅ Shared MQTT client initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize MQTT client: {e}")
-
-    # Initialize per-user MQTT manager
-    try:
-        user_mqtt_mgr = init_user_mqtt_manager(
-            broker_host=settings.MQTT_BROKER_HOST,
-            broker_port=settings.MQTT_BROKER_PORT,
-            username=settings.MQTT_USERNAME,
-            password=settings.MQTT_PASSWORD,
-            qos=1,
-            tls_enabled=settings.MQTT_TLS_ENABLED,
-            ca_certs=settings.MQTT_CA_CERTS if settings.MQTT_CA_CERTS else None,
-        )
-        user_mqtt_mgr.set_main_loop(main_loop)
-        logger.info("✅ Per-user MQTT manager initialized")
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize per-user MQTT manager: {e}")
+    await _step("Authentication manager", init_auth_manager)
+    await _step(
+        "Per-user MQTT manager",
+        lambda: _start_user_mqtt_manager(settings, main_loop),
+    )
 
-    # Initialize EMQX Auth Manager
-    try:
-        logger.info("🔐 Initializing EMQX Auth Manager...")
-        emqx_auth = init_emqx_auth_manager(
+    logger.info("🔐 Initializing EMQX Auth Manager...")
+    emqx_auth = await _step(
+        "EMQX Auth manager",
+        lambda: init_emqx_auth_manager(
             api_url=settings.EMQX_API_URL,
             api_key=settings.EMQX_API_KEY,
             api_secret=settings.EMQX_API_SECRET,
-        )
-    except Exception as e:
-        logger.error(f"❌ Failed to initialize EMQX Auth manager: {e}")
+        ),
+    )
+
+    # The ACL/SS caches, the broker connect, the EMQX check and the pool
+    # warm-up only depend on the database being ready, so run them concurrently
+    *_, emqx_ok = await asyncio.gather(
+        _step("Database connection pool", warm_up_pool()),
+        _step("Database-backed ACL manager", init_acl_manager()),
+        _step("Database-backed SS manager", init_ss_manager()),
+        _step("Shared MQTT client", _start_mqtt_client(settings)),
+        emqx_auth.verify_connection() if emqx_auth else asyncio.sleep(0, False),
+    )
 
     # Verify EMQX connection
-    if await emqx_auth.verify_connection():
+    if emqx_ok:
         logger.info("✅ EMQX API connected successfully")
     else:
         logger.warning("⚠️  EMQX API connection failed - MQTT auth may not work")
 
+    # Start background refresh of the status payloads
+    status_task = asyncio.create_task(_refresh_status_loop())
+
+    # Start batched writer for device last_seen updates
+    start_last_seen_writer()
+
     logger.info("🎉 Smart Factory Backend started successfully!")
 
     yield
@@ -131,6 +161,21 @@ async def lifespan(app: FastAPI):
     # Shutdown
     logger.info("🛑 Shutting down Smart Factory Backend...")
 
+    status_task.cancel()
+
+    await stop_last_seen_writer()
+    logger.info("✅ Device last_seen writer stopped")
+
+    acl_mgr = get_acl_manager()
+    if acl_mgr:
+        await acl_mgr.shutdown()
+        logger.info("✅ ACL manager stopped")
+
+    ss_mgr = get_ss_manager()
+    if ss_mgr:
+        await ss_mgr.shutdown()
+        logger.info("✅ SS manager stopped")
+
     mqtt = get_mqtt_client()
     if mqtt:
         mqtt.disconnect()
@@ -150,15 +195,16 @@ app = FastAPI(
     description="Backend API with PostgreSQL, MQTT, WebSocket, ACL, and Sensor Security",
     version="3.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=settings.allowed_origins,
+    allow_origins=tuple(settings.allowed_origins),
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=("GET", "POST", "PUT", "DELETE", "OPTIONS", "PATCH"),
+    allow_headers=("Authorization", "Content-Type"),
 )
 
 # Include routers
@@ -169,9 +215,8 @@ app.include_router(acl_router.router)
 app.include_router(ss_router.router)
 
 
-@app.get("/")
-async def root():
-    """Root endpoint with system status"""
+async def _root_status() -> dict:
+    """Build the system status returned by the root endpoint"""
     user_mqtt_mgr = get_user_mqtt_manager()
     acl_mgr = get_acl_manager()
     ss_mgr = get_ss_manager()
@@ -182,10 +227,10 @@ async def root():
         "message": "Smart Factory API is running! 🏭",
         "status": "healthy",
         "version": "3.0.0",
-        "environment": os.getenv("ENVIRONMENT", "development"),
+        "environment": settings.ENVIRONMENT,
         "storage": "postgresql",
         "features": {
-            "emqx_api": await emqx.verify_connection(),
+            "emqx_api": await emqx.verify_connection_cached(),
             "mqtt_connected": mqtt is not None,
             "mqtt_qos": mqtt.qos if mqtt else None,
             "acl_enabled": acl_mgr is not None,
@@ -200,9 +245,8 @@ async def root():
     }
 
 
-@app.get("/api/health")
-async def health_check(db: AsyncSession = Depends(get_db)):
-    """Comprehensive health check endpoint"""
+async def _health_status(db: AsyncSession) -> dict:
+    """Build the comprehensive health check payload"""
     db_healthy = await test_connection()
     mqtt = get_mqtt_client()
     emqx_auth = get_emqx_auth_manager()
@@ -214,12 +258,14 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         "status": "ok" if db_healthy else "error",
         "service": "Smart Factory Backend",
         "version": "3.0.0",
-        "environment": os.getenv("ENVIRONMENT", "development"),
+        "environment": settings.ENVIRONMENT,
         "checks": {
             "database": "connected" if db_healthy else "disconnected",
             "mqtt": "connected" if mqtt else "disconnected",
             "emqx": (
-                "connected" if await emqx_auth.verify_connection() else "disconnected"
+                "connected"
+                if await emqx_auth.verify_connection_cached()
+                else "disconnected"
             ),
             "acl": "enabled" if acl_mgr else "disabled",
             "ss": "enabled" if ss_mgr else "disabled",
@@ -230,15 +276,56 @@ async def health_check(db: AsyncSession = Depends(get_db)):
         "details": {
             "acl_info": await acl_mgr.get_acl_info(db) if acl_mgr else None,
             "ss_info": await ss_mgr.get_ss_info(db) if ss_mgr else None,
+            "db_pool": pool_status(),
         },
     }
 
 
+async def _refresh_status_loop():
+    """Periodically re-render the root and health payloads"""
+    global _cached_root_bytes, _cached_health_bytes, _cached_at
+    while True:
+        try:
+            root_bytes = orjson.dumps(await _root_status())
+            async with SessionLocal() as db:
+                health_bytes = orjson.dumps(await _health_status(db))
+            _cached_root_bytes, _cached_health_bytes = root_bytes, health_bytes
+            _cached_at = time.monotonic()
+        except Exception as e:
+            # Never keep serving a stale "ok", the endpoints build it live instead
+            logger.error("Error refreshing status payloads: %s", e)
+            _cached_root_bytes = _cached_health_bytes = None
+        await asyncio.sleep(STATUS_REFRESH_INTERVAL)
+
+
+def _cache_fresh() -> bool:
+    """Whether the cached payloads were rendered recently enough to serve"""
+    return time.monotonic() - _cached_at < 2 * STATUS_REFRESH_INTERVAL
+
+
+@app.get("/")
+async def root():
+    """Root endpoint with system status"""
+    if _cached_root_bytes is not None and _cache_fresh():
+        return Response(content=_cached_root_bytes, media_type="application/json")
+    return await _root_status()
+
+
+@app.get("/api/health")
+async def health_check(db: AsyncSession = Depends(get_ro_db)):
+    """Comprehensive health check endpoint"""
+    if _cached_health_bytes is not None and _cache_fresh():
+        return Response(content=_cached_health_bytes, media_type="application/json")
+    return await _health_status(db)
+
+
 if __name__ == "__main__":
     uvicorn.run(
         "main:app",
         host=settings.HOST,
         port=settings.PORT,
+        loop="uvloop",
+        http="httptools",
         reload=settings.DEBUG,
-        log_level=os.getenv("LOG_LEVEL", "info").lower(),
+        log_level=settings.LOG_LEVEL.lower(),
     )
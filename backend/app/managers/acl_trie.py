@@ -0,0 +1,181 @@
+"""
+MQTT topic filter trie for ACL permission matching
+
+Filters follow the MQTT spec: '+' matches exactly one topic level, '#' matches
+its parent level and everything below it and is only valid as the last level.
+Any other character, including '*', '?' and '[', is matched literally.
+"""
+
+import re
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterator, List, Optional, Tuple
+
+# (order, allowed actions, denied actions) of one permission rule
+TrieEntry = Tuple[int, FrozenSet[str], FrozenSet[str]]
+
+# action -> (order, denied) of the earliest rule on a filter mentioning it
+RuleMap = Dict[str, Tuple[int, bool]]
+
+
+def add_rule(rules: RuleMap, order: int, allow_set, deny_set):
+    """Project a rule onto per-action decisions, keeping the earliest one"""
+    for action in (*deny_set, *allow_set):
+        current = rules.get(action)
+        if current is None or order < current[0]:
+            rules[action] = (order, action in deny_set)
+
+
+@lru_cache(maxsize=8192)
+def split_topic(topic: str) -> Tuple[str, ...]:
+    """Split a topic into levels, memoized since clients reuse a few topics"""
+    return tuple(topic.split("/"))
+
+
+class _Node:
+    """One topic level in the trie"""
+
+    __slots__ = ("children", "rules")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.rules: RuleMap = {}
+
+
+class TopicTrie:
+    """Topic filters keyed by level, with '+' and '#' as wildcard branches"""
+
+    __slots__ = ("_root", "min_order")
+
+    def __init__(self):
+        self._root = _Node()
+        self.min_order = float("inf")  # Lowest order of any inserted filter
+
+    def insert(self, pattern: str, allow_set, deny_set, order: int = 0):
+        """Add a topic filter with its allowed/denied actions"""
+        node = self._root
+        for level in pattern.split("/"):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _Node()
+            node = child
+        add_rule(node.rules, order, frozenset(allow_set), frozenset(deny_set))
+        if order < self.min_order:
+            self.min_order = order
+
+    def iter_match(self, topic: str) -> Iterator[RuleMap]:
+        """Yield the rule maps of every filter matching the topic"""
+        levels = split_topic(topic)
+        depth_end = len(levels)
+        stack = deque([(self._root, 0)])
+        while stack:
+            node, depth = stack.pop()
+            children = node.children
+
+            # '#' matches the parent level and everything below it
+            multi = children.get("#")
+            if multi is not None and multi.rules:
+                yield multi.rules
+
+            if depth == depth_end:
+                if node.rules:
+                    yield node.rules
+                continue
+
+            child = children.get(levels[depth])
+            if child is not None:
+                stack.append((child, depth + 1))
+            single = children.get("+")
+            if single is not None:
+                stack.append((single, depth + 1))
+
+
+def is_spec_filter(pattern: str) -> bool:
+    """True if wildcards fill whole levels and no glob metacharacters appear
+
+    The fnmatch based matcher this trie replaced treated '*', '?' and '[..]'
+    as globs and let '+' span levels, rules relying on that no longer match.
+    """
+    if any(c in pattern for c in "*?["):
+        return False
+    levels = pattern.split("/")
+    for i, level in enumerate(levels):
+        if level == "#" and i != len(levels) - 1:
+            return False
+        if level not in ("+", "#") and ("+" in level or "#" in level):
+            return False
+    return True
+
+
+def prefix_key(pattern: str) -> Optional[str]:
+    """Return 'a/b' for a plain 'a/b/#' filter ('' for '#'), otherwise None"""
+    if pattern == "#":
+        return ""
+    if not pattern.endswith("/#"):
+        return None
+    head = pattern[:-2]
+    if "+" in head or "#" in head or "${" in head:
+        return None
+    return head
+
+
+def iter_prefix_matches(prefixes: Dict[str, RuleMap], topic: str) -> Iterator[RuleMap]:
+    """Yield the rule maps of every 'prefix/#' filter covering the topic"""
+    rules = prefixes.get("")
+    if rules:
+        yield rules
+    pos = topic.find("/")
+    while pos != -1:
+        rules = prefixes.get(topic[:pos])
+        if rules:
+            yield rules
+        pos = topic.find("/", pos + 1)
+    # 'a/#' also matches 'a' itself
+    rules = prefixes.get(topic)
+    if rules:
+        yield rules
+
+
+def filter_to_regex(pattern: str) -> str:
+    """Translate an MQTT topic filter into an equivalent regex"""
+    levels = pattern.split("/")
+    tail = ""
+    if levels[-1] == "#":
+        levels = levels[:-1]
+        # 'a/#' also matches 'a' itself, a bare '#' matches everything
+        tail = "(?:/.*)?" if levels else ".*"
+    head = "/".join("[^/]*" if level == "+" else re.escape(level) for level in levels)
+    return head + tail
+
+
+class CompiledFilters:
+    """Topic filters mentioning one action, compiled into a single regex"""
+
+    __slots__ = ("_regex", "_groups")
+
+    def __init__(self, filters: List[Tuple[str, TrieEntry]], action: str):
+        relevant = sorted(
+            (
+                entry
+                for entry in filters
+                if action in entry[1][1] or action in entry[1][2]
+            ),
+            key=lambda entry: entry[1][0],
+        )
+        # Alternatives are tried in rule order, so fullmatch reports the
+        # earliest rule that matches the whole topic
+        self._regex = re.compile(
+            "|".join(
+                f"(?P<p{i}>{filter_to_regex(pattern)})"
+                for i, (pattern, _) in enumerate(relevant)
+            )
+        )
+        self._groups: Dict[str, Tuple[int, bool]] = {
+            f"p{i}": (order, action in deny)
+            for i, (_, (order, _, deny)) in enumerate(relevant)
+        }
+
+    def match(self, topic: str) -> Optional[Tuple[int, bool]]:
+        """Return (order, denied) for the earliest matching rule, if any"""
+        m = self._regex.fullmatch(topic)
+        return self._groups[m.lastgroup] if m else None
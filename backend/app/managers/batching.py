@@ -0,0 +1,137 @@
+"""
+Batching helpers shared by the database managers
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class BatchLoader:
+    """Coalesces lookups made in the same event loop tick into one query"""
+
+    def __init__(self, load_many: Callable[[List[Any]], Awaitable[Dict[Any, Any]]]):
+        self._load_many = load_many
+        self._pending: Dict[Any, List[asyncio.Future]] = {}
+        self._scheduled = False
+        self._task: Optional[asyncio.Task] = None
+
+    async def load(self, key):
+        """Queue a lookup and wait for the batched result (None if not found)"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.setdefault(key, []).append(future)
+        if not self._scheduled:
+            # The task first runs after every callback already queued, so all
+            # lookups issued in this tick end up in the same batch
+            self._scheduled = True
+            self._task = loop.create_task(self._dispatch())
+        return await future
+
+    async def _dispatch(self):
+        """Load every pending key at once and resolve the waiters"""
+        pending, self._pending = self._pending, {}
+        self._scheduled = False
+        try:
+            found = await self._load_many(list(pending))
+        except Exception as e:
+            for futures in pending.values():
+                for future in futures:
+                    if not future.done():
+                        future.set_exception(e)
+            return
+
+        for key, futures in pending.items():
+            for future in futures:
+                if not future.done():
+                    future.set_result(found.get(key))
+
+
+class BatchWriter:
+    """Inserts queued rows of one model in batches from a background task"""
+
+    def __init__(
+        self,
+        model,
+        name: str,
+        batch_size: int = 500,
+        maxsize: int = 10_000,
+        drop_oldest: bool = False,
+    ):
+        self._model = model
+        self._name = name  # For log messages, e.g. "audit log"
+        self._batch_size = batch_size
+        # When full, either the oldest queued row or the new one is dropped
+        self._drop_oldest = drop_oldest
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self._dropped = 0
+        self._task: Optional[asyncio.Task] = None
+        # Set by stop, which also queues None to wake the loop
+        self._stopping = False
+
+    def start(self):
+        """Start the background writer"""
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        """Stop the background writer and write out queued rows"""
+        task, self._task = self._task, None
+        if task:
+            # Let the loop write the batch it holds, then stop
+            self._stopping = True
+            try:
+                self._queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass  # The loop isn't waiting, it sees the flag after this batch
+            await task
+        while not self._queue.empty():
+            await self._write_batch(self._drain())
+
+    def put(self, row: Dict[str, Any]):
+        """Queue a row, dropping one when the queue is full"""
+        try:
+            self._queue.put_nowait(row)
+            return
+        except asyncio.QueueFull:
+            if self._drop_oldest:
+                self._queue.get_nowait()
+                self._queue.put_nowait(row)
+        self._dropped += 1
+        if self._dropped % 1000 == 1:
+            logger.warning(
+                f"{self._name.capitalize()} queue full, {self._dropped} rows dropped"
+            )
+
+    def _drain(self, first: Optional[Dict] = None) -> List[Dict]:
+        """Take up to one batch of queued rows"""
+        rows = [first] if first is not None else []
+        while len(rows) < self._batch_size and not self._queue.empty():
+            row = self._queue.get_nowait()
+            if row is not None:
+                rows.append(row)
+        return rows
+
+    async def _loop(self):
+        """Insert queued rows in batches as they arrive"""
+        while not self._stopping:
+            first = await self._queue.get()
+            await self._write_batch(self._drain(first))
+
+    async def _write_batch(self, rows: List[Dict]):
+        """Insert a batch of rows with one statement"""
+        if not rows:
+            return
+        try:
+            async with SessionLocal() as db:
+                await db.execute(insert(self._model), rows)
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error writing {len(rows)} {self._name} rows: {e}")
@@ -3,29 +3,118 @@ Async Database-backed ACL Manager for Smart Factory
 Supports async SQLAlchemy sessions and caching
 """
 
+import asyncio
 import logging
-from typing import Dict, List, Optional
-import fnmatch
-from datetime import datetime, timedelta, timezone
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+import random
+import sys
+import time
+from types import MappingProxyType
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from datetime import datetime, timezone
+from weakref import WeakValueDictionary
+from cachetools import LRUCache, TTLCache
+from sqlalchemy import bindparam, func, select, update
+from sqlalchemy.orm import raiseload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.acl_models import ACLUser, ACLRole, ACLConfig, ACLAuditLog
-from app.database import SessionLocal
+from app.config import settings
+from app.database import SessionLocal, engine
+from app.managers.acl_trie import (
+    CompiledFilters,
+    RuleMap,
+    TopicTrie,
+    TrieEntry,
+    add_rule,
+    is_spec_filter,
+    iter_prefix_matches,
+    prefix_key,
+)
+from app.managers.batching import BatchLoader, BatchWriter
 
 logger = logging.getLogger(__name__)
 
+# Everything the ACL cache reads from a user: its roles and their JSON
+# permissions. Any other relationship access raises instead of lazy loading.
+USER_PERMISSION_LOAD = (
+    selectinload(ACLUser.roles).raiseload("*"),
+    raiseload("*"),
+)
+
+# Users with more wildcard rules than this get per-action compiled regexes
+WILDCARD_REGEX_THRESHOLD = 64
+
+# Postgres NOTIFY channel used to evict cached users in every worker
+ACL_INVALIDATE_CHANNEL = "acl_invalidate"
+
+# Cached user lifetime while NOTIFY evictions arrive, and while they can't
+USER_CACHE_TTL = 3600
+USER_CACHE_FALLBACK_TTL = 300
+
+# Longest wait between attempts to reconnect the invalidation listener
+LISTEN_RETRY_MAX = 60.0
+
+
+class _Matcher(NamedTuple):
+    """A user's permissions bucketed by how their topic filter is matched"""
+
+    exact: Dict[str, RuleMap]  # literal topics
+    prefixes: Dict[str, RuleMap]  # plain 'a/b/#' filters, keyed by 'a/b'
+    trie: TopicTrie  # every other wildcard filter
+    compiled: Optional[Dict[str, "CompiledFilters"]]  # large wildcard sets
+    wildcard_min: float  # lowest rule order among non-literal filters
+
+
+async def _load_active_users(usernames: List[str]) -> Dict[str, ACLUser]:
+    """Load the given active users and their roles with one IN query"""
+    async with SessionLocal() as session:
+        result = await session.execute(
+            select(ACLUser)
+            .where(ACLUser.username.in_(usernames), ACLUser.is_active == True)
+            .options(*USER_PERMISSION_LOAD)
+        )
+        return {u.username: u for u in result.scalars().all()}
+
 
 class DatabaseACLManager:
     """Async Database-backed Access Control List Manager with caching"""
 
     def __init__(self):
         self.last_loaded: Optional[datetime] = None
-        self._config_cache: Dict[str, str] = {}
-        self._cache_timeout = timedelta(minutes=5)
-        self._user_cache: Dict[str, Dict] = (
-            {}
-        )  # user_id -> {'roles': [...], 'permissions': [...], 'ts': datetime}
+        self.default_policy = "deny"
+        self._default_allow = False
+        # Read-only config snapshot, replaced as a whole on reload
+        self._config: MappingProxyType = MappingProxyType({})
+        # username -> {'roles', 'permissions', 'matcher'}; entries are evicted on
+        # change through ACL_INVALIDATE_CHANNEL. The long TTL is only a safety
+        # net and is used only while the listener is connected.
+        self._user_cache: TTLCache = TTLCache(
+            maxsize=10_000, ttl=USER_CACHE_FALLBACK_TTL
+        )
+        self._listen_conn = None
+        self._listen_raw = None  # asyncpg connection behind _listen_conn
+        self._listen_task: Optional[asyncio.Task] = None
+        self._config_task: Optional[asyncio.Task] = None  # Reload after NOTIFY '*'
+        # One lock per username being loaded, so a cold user is fetched once
+        self._user_locks: "WeakValueDictionary[str, asyncio.Lock]" = (
+            WeakValueDictionary()
+        )
+        self._loader = BatchLoader(_load_active_users)
+        # Usernames that recently resolved to no active user
+        self._missing_users: TTLCache = TTLCache(maxsize=4096, ttl=30)
+        # (username, action, topic) -> decision, to absorb publish bursts
+        self._decision_cache: TTLCache = TTLCache(maxsize=100_000, ttl=1.0)
+        # (username, ACLUser.permissions_version()) -> matcher, so reloading an
+        # unchanged user after eviction or TTL expiry skips recompiling
+        self._matcher_cache: LRUCache = LRUCache(maxsize=10_000)
+        # last_login epoch seconds waiting for the next bulk write; turned into
+        # datetimes only when written
+        self._pending_last_login: Dict[str, float] = {}
+        self._last_login_interval = 30.0
+        self._last_login_task: Optional[asyncio.Task] = None
+        # Set by shutdown to end the loop without interrupting a write
+        self._last_login_stop = asyncio.Event()
+        # Audit rows waiting for the next bulk insert
+        self._audit_writer = BatchWriter(ACLAuditLog, "audit log")
 
     # -------------------------------
     #   CONFIG LOADING
@@ -33,105 +122,292 @@ class DatabaseACLManager:
     async def _load_config(self):
         """Load ACL configuration from database"""
         try:
-            session = SessionLocal()
-            async with session as db:
-                result = await db.execute(select(ACLConfig))
-                configs = result.scalars().all()
-                self._config_cache = {c.key: c.value for c in configs}
-                self.default_policy = self._config_cache.get("default_policy", "deny")
-                self.last_loaded = datetime.now(timezone.utc)
-                logger.info(f"ACL config loaded, default_policy={self.default_policy}")
+            async with SessionLocal() as db:
+                config = MappingProxyType(dict(await ACLConfig.get_config_dict(db)))
         except Exception as e:
+            # Keep serving the previous snapshot (or the deny default)
             logger.error(f"Error loading ACL config: {e}")
-            self.default_policy = "deny"
-            self._config_cache = {}
+            return
+
+        self._config = config
+        self.default_policy = config.get("default_policy", "deny")
+        self._default_allow = self.default_policy == "allow"
+        self.last_loaded = datetime.now(timezone.utc)
+        logger.info(f"ACL config loaded, default_policy={self.default_policy}")
 
     async def reload(self, db: AsyncSession):
         """Reload ACL configuration"""
-        await self._load_config(db)
-        self._user_cache.clear()
+        ACLConfig.invalidate_config_dict()
+        await self._load_config()
+        self._drop_cached_user("*")
+        if self._listen_raw is not None:
+            # Sent from the listener connection, so _on_invalidate can tell
+            # this worker's own reload apart by the backend pid
+            await self._listen_raw.execute(
+                "SELECT pg_notify($1, $2)", ACL_INVALIDATE_CHANNEL, "*"
+            )
+        else:
+            await db.execute(select(func.pg_notify(ACL_INVALIDATE_CHANNEL, "*")))
+
+    # -------------------------------
+    #   BACKGROUND WRITES
+    # -------------------------------
+    def start(self):
+        """Start the invalidation listener and the background writers"""
+        if self._listen_task is None:
+            self._listen_task = asyncio.create_task(self._listen_loop())
+        if self._last_login_task is None:
+            self._last_login_stop.clear()
+            self._last_login_task = asyncio.create_task(self._last_login_loop())
+        self._audit_writer.start()
+
+    async def _listen_loop(self):
+        """Keep the invalidation listener connected, reconnecting with backoff"""
+        delay = 1.0
+        while True:
+            lost = asyncio.Event()
+            try:
+                await self._listen_for_invalidations(lost)
+            except Exception as e:
+                logger.warning(f"ACL cache invalidation listener unavailable: {e}")
+            else:
+                delay = 1.0
+                # Evictions may have been missed while disconnected
+                self._set_user_cache_ttl(USER_CACHE_TTL)
+                await lost.wait()
+                logger.warning("ACL cache invalidation listener lost, reconnecting")
+            # Without evictions, cached users must expire on their own quickly
+            self._set_user_cache_ttl(USER_CACHE_FALLBACK_TTL)
+            await self._close_listener()
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, LISTEN_RETRY_MAX)
+
+    async def _listen_for_invalidations(self, lost: asyncio.Event):
+        """Subscribe to cache evictions published by any worker"""
+        self._listen_conn = await engine.connect()
+        raw = (await self._listen_conn.get_raw_connection()).driver_connection
+        raw.add_termination_listener(lambda connection: lost.set())
+        await raw.add_listener(ACL_INVALIDATE_CHANNEL, self._on_invalidate)
+        self._listen_raw = raw
+
+    async def _close_listener(self):
+        """Release the listener connection, which may already be dead"""
+        conn, self._listen_conn = self._listen_conn, None
+        self._listen_raw = None
+        if conn is None:
+            return
+        try:
+            await conn.invalidate()
+        except Exception as e:
+            logger.debug(f"Error closing ACL listener connection: {e}")
+
+    def _set_user_cache_ttl(self, ttl: float):
+        """Swap in an empty user cache with a new TTL, if the TTL changes"""
+        if self._user_cache.ttl != ttl:
+            self._user_cache = TTLCache(maxsize=self._user_cache.maxsize, ttl=ttl)
+            self._drop_cached_user("*")
+
+    def _on_invalidate(self, connection, pid, channel, payload):
+        """asyncpg notification callback"""
+        self._drop_cached_user(payload)
+        # connection is the listener itself, our own reload() notifies from it
+        if payload == "*" and pid != connection.get_server_pid():
+            # A reload in another worker, pick up the new config here too
+            ACLConfig.invalidate_config_dict()
+            self._config_task = asyncio.get_running_loop().create_task(
+                self._load_config()
+            )
+
+    async def shutdown(self):
+        """Stop background tasks and write out pending rows"""
+        if self._listen_task is not None:
+            self._listen_task.cancel()
+            await asyncio.gather(self._listen_task, return_exceptions=True)
+            self._listen_task = None
+        await self._close_listener()
+        task, self._last_login_task = self._last_login_task, None
+        if task:
+            # Let a write in progress finish before the final flush below
+            self._last_login_stop.set()
+            await task
+        await self._audit_writer.stop()
+        await self._flush_last_login()
+
+    async def _last_login_loop(self):
+        """Periodically write the collected last_login values until shutdown"""
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._last_login_stop.wait(), self._last_login_interval
+                )
+                return
+            except asyncio.TimeoutError:
+                await self._flush_last_login()
+
+    async def _flush_last_login(self):
+        """Write all pending last_login values with one executemany UPDATE"""
+        if not self._pending_last_login:
+            return
+        pending, self._pending_last_login = self._pending_last_login, {}
+        users = ACLUser.__table__
+        try:
+            async with SessionLocal() as db:
+                await db.execute(
+                    update(users)
+                    .where(users.c.username == bindparam("b_username"))
+                    .values(last_login=bindparam("b_last_login")),
+                    [
+                        {
+                            "b_username": username,
+                            "b_last_login": datetime.fromtimestamp(ts, timezone.utc),
+                        }
+                        for username, ts in pending.items()
+                    ],
+                )
+                await db.commit()
+        except Exception as e:
+            logger.error(f"Error writing last_login updates: {e}")
 
     # -------------------------------
     #   TOPIC MATCHING
     # -------------------------------
     def _expand_topic_pattern(self, pattern: str, username: str) -> str:
         """Expand topic pattern with username variable"""
+        if "${" not in pattern:
+            return pattern
         return pattern.replace("${username}", username).replace("${user_id}", username)
 
-    def _match_topic(self, topic: str, pattern: str) -> bool:
-        """Match MQTT topic against pattern with wildcards"""
-        mqtt_pattern = pattern.replace("+", "*").replace("#", "**")
-        if "**" in mqtt_pattern:
-            pattern_parts = mqtt_pattern.split("/")
-            topic_parts = topic.split("/")
-            if pattern_parts[-1] == "**":
-                return fnmatch.fnmatch(
-                    "/".join(topic_parts[: len(pattern_parts) - 1]),
-                    "/".join(pattern_parts[:-1]),
+    def _build_matcher(self, permissions: List[Dict], username: str) -> _Matcher:
+        """Bucket a user's permissions by how their topic filter is matched"""
+        exact: Dict[str, RuleMap] = {}
+        prefixes: Dict[str, RuleMap] = {}
+        trie = TopicTrie()
+        wildcards: List[Tuple[str, TrieEntry]] = []
+        for order, p in enumerate(permissions):
+            pattern = self._expand_topic_pattern(p.get("pattern", ""), username)
+            entry = (order, frozenset(p.get("allow", [])), frozenset(p.get("deny", [])))
+            if not is_spec_filter(pattern):
+                logger.warning(
+                    f"ACL filter {pattern!r} of {username} is not a valid MQTT "
+                    "topic filter, it no longer matches as a glob"
                 )
-        return fnmatch.fnmatch(topic, mqtt_pattern)
+            if "+" in pattern or "#" in pattern or "${" in pattern:
+                wildcards.append((pattern, entry))
+                prefix = prefix_key(pattern)
+                if prefix is not None:
+                    add_rule(prefixes.setdefault(prefix, {}), *entry)
+                else:
+                    trie.insert(pattern, entry[1], entry[2], order)
+            else:
+                add_rule(exact.setdefault(sys.intern(pattern), {}), *entry)
+
+        # Walking the trie gets expensive for very large rule sets, one regex
+        # per action keeps matching cost flat in the number of rules
+        compiled = None
+        if len(wildcards) > WILDCARD_REGEX_THRESHOLD:
+            actions = set()
+            for _, (_, allow, deny) in wildcards:
+                actions |= allow | deny
+            compiled = {a: CompiledFilters(wildcards, a) for a in actions}
+
+        wildcard_min = wildcards[0][1][0] if wildcards else float("inf")
+        return _Matcher(exact, prefixes, trie, compiled, wildcard_min)
+
+    @staticmethod
+    def _pick_rule(
+        rule_maps: Iterable[RuleMap],
+        action: str,
+        best_order: Optional[int],
+        denied: bool,
+    ) -> Tuple[Optional[int], bool]:
+        """Keep the earliest matching permission that mentions the action"""
+        for rules in rule_maps:
+            hit = rules.get(action)
+            if hit is not None and (best_order is None or hit[0] < best_order):
+                best_order, denied = hit
+        return best_order, denied
 
     # -------------------------------
     #   USER DATA (CACHED)
     # -------------------------------
 
     async def _get_user(self, username: str, db: AsyncSession) -> Optional[ACLUser]:
-        """Get user from database with relationships"""
-        result = await db.execute(
-            select(ACLUser)
-            .where(ACLUser.username == username, ACLUser.is_active == True)
-            .options(selectinload(ACLUser.roles))
-        )
-        return result.scalars().first()
+        """Get user with roles (read-only), fetched once per session"""
+        memo = db.info.setdefault("acl_user_cache", {})
+        if username in memo:
+            return memo[username]
+        if username in self._missing_users:
+            return None
+        user = await self._loader.load(username)
+        if user is None:
+            self._missing_users[username] = True
+        memo[username] = user
+        return user
+
+    def _drop_cached_user(self, username: str):
+        """Drop cached data for one user, or for everyone with '*'"""
+        self._decision_cache.clear()
+        if username == "*":
+            self._user_cache.clear()
+            self._missing_users.clear()
+        else:
+            self._user_cache.pop(username, None)
+            self._missing_users.pop(username, None)
+
+    async def invalidate_user(self, username: str, db: AsyncSession):
+        """Evict a changed user here and, once db commits, in every worker"""
+        self._drop_cached_user(username)
+        db.info.get("acl_user_cache", {}).pop(username, None)
+        await db.execute(select(func.pg_notify(ACL_INVALIDATE_CHANNEL, username)))
+
+    def _build_entry(self, user: Optional[ACLUser], username: str) -> Dict:
+        """Build the cached id/roles/permissions/matcher entry for a user"""
+        permissions = user.get_all_permissions() if user else []
+        version = user.permissions_version() if user else None
+        key = (username, version)
+        matcher = self._matcher_cache.get(key) if version is not None else None
+        if matcher is None:
+            matcher = self._build_matcher(permissions, username)
+            if version is not None:
+                self._matcher_cache[key] = matcher
+        return {
+            "user_id": user.id if user else None,  # None: no such active user
+            "roles": [r.name for r in user.roles] if user else [],
+            "permissions": permissions,
+            "matcher": matcher,
+        }
+
+    async def _get_user_entry(self, username: str, db: AsyncSession) -> Dict:
+        """Get the cached entry for a user, loading it at most once at a time"""
+        entry = self._user_cache.get(username)
+        if entry is not None:
+            return entry
+
+        lock = self._user_locks.get(username)
+        if lock is None:
+            lock = self._user_locks[username] = asyncio.Lock()
+        async with lock:
+            entry = self._user_cache.get(username)
+            if entry is None:
+                user = await self._get_user(username, db)
+                entry = self._build_entry(user, username)
+                # Unknown users are remembered briefly by _missing_users only
+                if user is not None:
+                    self._user_cache[username] = entry
+            return entry
 
     async def get_user_roles(self, username: str, db: AsyncSession) -> List[str]:
         """Get roles with caching"""
-        now = datetime.now(timezone.utc)
-        cached = self._user_cache.get(username)
-        if cached and now - cached["ts"] < self._cache_timeout and cached.get("roles"):
-            return cached["roles"]
-
         try:
-            user = await self._get_user(username, db)
-            roles = [r.name for r in user.roles] if user else []
-            if cached:
-                cached["roles"] = roles
-                cached["ts"] = now
-            else:
-                self._user_cache[username] = {
-                    "roles": roles,
-                    "permissions": [],
-                    "ts": now,
-                }
-            return roles
+            return (await self._get_user_entry(username, db))["roles"]
         except Exception as e:
             logger.error(f"Error getting roles for {username}: {e}")
             return []
 
     async def get_user_permissions(self, username: str, db: AsyncSession) -> List[Dict]:
         """Get permissions with caching"""
-        now = datetime.now(timezone.utc)
-        cached = self._user_cache.get(username)
-        if (
-            cached
-            and now - cached["ts"] < self._cache_timeout
-            and cached.get("permissions")
-        ):
-            return cached["permissions"]
-
         try:
-            user = await self._get_user(username, db)
-            permissions = user.get_all_permissions() if user else []
-            if cached:
-                cached["permissions"] = permissions
-                cached["ts"] = now
-            else:
-                self._user_cache[username] = {
-                    "roles": [],
-                    "permissions": permissions,
-                    "ts": now,
-                }
-            return permissions
+            return (await self._get_user_entry(username, db))["permissions"]
         except Exception as e:
             logger.error(f"Error getting permissions for {username}: {e}")
             return []
@@ -143,69 +419,99 @@ class DatabaseACLManager:
         self, username: str, topic: str, action: str, db: AsyncSession
     ) -> bool:
         """Check if user has permission for topic/action"""
+        # Clients tend to hit the same topic in bursts, so reuse decisions for
+        # a second; every check still goes to the audit log
+        key = (username, action, topic)
+        decision = self._decision_cache.get(key)
+        if decision is None:
+            decision = await self._decide(username, topic, action, db)
+            if decision[2] != "error":
+                self._decision_cache[key] = decision
+
+        allowed, user_id, result, reason = decision
+        if user_id is not None:
+            # Update last login (written in bulk by the background task)
+            self._pending_last_login[username] = time.time()
+        self._log_permission_check(user_id, username, topic, action, result, reason)
+        return allowed
+
+    async def _decide(
+        self, username: str, topic: str, action: str, db: AsyncSession
+    ) -> Tuple[bool, Optional[int], str, str]:
+        """Evaluate a check as (allowed, user_id, audit result, audit reason)"""
+        user_id = None
         try:
-            user = await self._get_user(username, db)
-            if not user:
-                await self._log_permission_check(
-                    username, topic, action, "denied", "user_not_found", db
-                )
-                return self.default_policy == "allow"
-
-            # Update last login
-            user.last_login = datetime.now(timezone.utc)
-            await db.flush()
-
-            permissions = await self.get_user_permissions(username, db)
-            for p in permissions:
-                pattern = self._expand_topic_pattern(p.get("pattern", ""), username)
-                allow = p.get("allow", [])
-                deny = p.get("deny", [])
-                if self._match_topic(topic, pattern):
-                    if action in deny:
-                        await self._log_permission_check(
-                            username, topic, action, "denied", "explicit_deny", db
+            # A cached entry answers without touching the database
+            entry = await self._get_user_entry(username, db)
+            user_id = entry["user_id"]
+            if user_id is None:
+                return self._default_allow, None, "denied", "user_not_found"
+
+            matcher = entry["matcher"]
+
+            # Literal topics are a single dict lookup; wildcard filters are
+            # only consulted when an earlier one could still take precedence
+            topic = sys.intern(topic)
+            exact = matcher.exact
+            hit = exact[topic].get(action) if topic in exact else None
+            best_order, denied = hit if hit is not None else (None, False)
+            if best_order is None or best_order > matcher.wildcard_min:
+                compiled = matcher.compiled
+                if compiled is not None:
+                    hit = compiled[action].match(topic) if action in compiled else None
+                    if hit and (best_order is None or hit[0] < best_order):
+                        best_order, denied = hit
+                else:
+                    # 'a/b/#' filters are prefix lookups, the rest walk the trie
+                    if matcher.prefixes:
+                        best_order, denied = self._pick_rule(
+                            iter_prefix_matches(matcher.prefixes, topic),
+                            action,
+                            best_order,
+                            denied,
                         )
-                        return False
-                    if action in allow:
-                        await self._log_permission_check(
-                            username, topic, action, "allowed", "permission_match", db
+                    trie = matcher.trie
+                    if best_order is None or best_order > trie.min_order:
+                        best_order, denied = self._pick_rule(
+                            trie.iter_match(topic), action, best_order, denied
                         )
-                        return True
 
-            await self._log_permission_check(
-                username, topic, action, "denied", "no_match", db
-            )
-            return self.default_policy == "allow"
+            if best_order is not None:
+                if denied:
+                    return False, user_id, "denied", "explicit_deny"
+                return True, user_id, "allowed", "permission_match"
+
+            return self._default_allow, user_id, "denied", "no_match"
 
         except Exception as e:
             logger.error(f"Error checking permission for {username}: {e}")
-            await self._log_permission_check(
-                username, topic, action, "error", str(e), db
-            )
-            return False
+            return False, user_id, "error", str(e)
 
-    async def _log_permission_check(
+    def _log_permission_check(
         self,
+        user_id: Optional[int],
         username: str,
         topic: str,
         action: str,
         result: str,
         reason: str,
-        db: AsyncSession,
     ):
-        """Log permission check to audit log"""
-        try:
-            entry = ACLAuditLog(
-                username=username,
-                action="permission_check",
-                resource=f"{action}:{topic}",
-                result=result,
-                details={"reason": reason},
-            )
-            db.add(entry)
-            await db.flush()
-        except Exception as e:
-            logger.error(f"Error logging permission check: {e}")
+        """Queue a permission check for the audit log"""
+        # Rows need a user_id, so checks for unknown users are not recorded
+        if user_id is None:
+            return
+        # Denials and errors are always kept, allowed checks may be sampled
+        if result == "allowed" and random.random() >= settings.ACL_AUDIT_SAMPLE_RATE:
+            return
+        self._audit_writer.put(
+            {
+                "user_id": user_id,
+                "action": "permission_check",
+                "resource": f"{action}:{topic}",
+                "result": result,
+                "details": {"reason": reason, "username": username},
+            }
+        )
 
     async def can_subscribe(self, username: str, topic: str, db: AsyncSession) -> bool:
         """Check if user can subscribe to topic"""
@@ -236,32 +542,40 @@ class DatabaseACLManager:
             if existing:
                 raise ValueError(f"User {username} already exists")
 
+            role_map = await self._get_roles_by_name(roles, db)
+            user_roles = []
+            for role_name in roles:
+                role = role_map.get(role_name)
+                if role:
+                    user_roles.append(role)
+                else:
+                    logger.warning(f"Role {role_name} does not exist")
+
             user = ACLUser(
                 username=username,
                 email=email,
                 hashed_password=hashed_password,
                 custom_permissions=custom_permissions or [],
                 is_active=True,
+                roles=user_roles,
             )
             db.add(user)
             await db.flush()
-
-            for role_name in roles:
-                result = await db.execute(
-                    select(ACLRole).where(ACLRole.name == role_name)
-                )
-                role = result.scalars().first()
-                if role:
-                    user.roles.append(role)
-                else:
-                    logger.warning(f"Role {role_name} does not exist")
-
-            await db.flush()
+            await self.invalidate_user(username, db)
             return user
         except Exception as e:
             logger.error(f"Error adding user: {e}")
             raise
 
+    async def _get_roles_by_name(
+        self, names: List[str], db: AsyncSession
+    ) -> Dict[str, ACLRole]:
+        """Fetch the named roles with one IN query"""
+        if not names:
+            return {}
+        result = await db.execute(select(ACLRole).where(ACLRole.name.in_(names)))
+        return {r.name: r for r in result.scalars().all()}
+
     async def remove_user(self, username: str, db: AsyncSession):
         """Remove user (soft delete)"""
         try:
@@ -272,7 +586,7 @@ class DatabaseACLManager:
             if user:
                 user.is_active = False
                 await db.flush()
-                self._user_cache.pop(username, None)
+                await self.invalidate_user(username, db)
             else:
                 logger.warning(f"User {username} not found")
         except Exception as e:
@@ -294,31 +608,17 @@ class DatabaseACLManager:
                 raise ValueError(f"User {username} not found")
 
             user.roles.clear()
+            role_map = await self._get_roles_by_name(roles, db)
             for role_name in roles:
-                result = await db.execute(
-                    select(ACLRole).where(ACLRole.name == role_name)
-                )
-                role = result.scalars().first()
+                role = role_map.get(role_name)
                 if role:
                     user.roles.append(role)
                 else:
                     logger.warning(f"Role {role_name} not found")
 
             await db.flush()
+            await self.invalidate_user(username, db)
 
-            # Update cache
-            now = datetime.now(timezone.utc)
-            cached = self._user_cache.get(username)
-            if cached:
-                cached["roles"] = [r.name for r in user.roles]
-                cached["permissions"] = user.get_all_permissions()
-                cached["ts"] = now
-            else:
-                self._user_cache[username] = {
-                    "roles": [r.name for r in user.roles],
-                    "permissions": user.get_all_permissions(),
-                    "ts": now,
-                }
         except Exception as e:
             logger.error(f"Error updating user roles: {e}")
             raise
@@ -329,32 +629,19 @@ class DatabaseACLManager:
         """Add custom permission to user"""
         try:
             result = await db.execute(
-                select(ACLUser).where(
-                    ACLUser.username == username, ACLUser.is_active == True
-                )
+                select(ACLUser)
+                .where(ACLUser.username == username, ACLUser.is_active == True)
+                .options(selectinload(ACLUser.roles))
             )
             user = result.scalars().first()
             if not user:
                 raise ValueError(f"User {username} not found")
 
-            if not user.custom_permissions:
-                user.custom_permissions = []
-            user.custom_permissions.append(permission)
+            # Assign a new list, in-place changes to a JSON column aren't tracked
+            user.custom_permissions = [*(user.custom_permissions or []), permission]
             await db.flush()
+            await self.invalidate_user(username, db)
 
-            # Update cache
-            now = datetime.now(timezone.utc)
-            cached = self._user_cache.get(username)
-            if cached:
-                cached["roles"] = [r.name for r in user.roles]
-                cached["permissions"] = user.get_all_permissions()
-                cached["ts"] = now
-            else:
-                self._user_cache[username] = {
-                    "roles": [r.name for r in user.roles],
-                    "permissions": user.get_all_permissions(),
-                    "ts": now,
-                }
         except Exception as e:
             logger.error(f"Error adding user permission: {e}")
             raise
@@ -365,15 +652,16 @@ class DatabaseACLManager:
     async def get_acl_info(self, db: AsyncSession) -> Dict:
         """Get ACL system info"""
         try:
-            result = await db.execute(select(ACLUser).where(ACLUser.is_active == True))
-            total_users = len(result.scalars().all())
-
-            result = await db.execute(select(ACLRole))
-            total_roles = len(result.scalars().all())
+            total_users = await db.scalar(
+                select(func.count())
+                .select_from(ACLUser)
+                .where(ACLUser.is_active == True)
+            )
+            total_roles = await db.scalar(select(func.count()).select_from(ACLRole))
 
             return {
-                "version": self._config_cache.get("version", "unknown"),
-                "default_policy": getattr(self, "default_policy", "deny"),
+                "version": self._config.get("version", "unknown"),
+                "default_policy": self.default_policy,
                 "total_users": total_users,
                 "total_roles": total_roles,
                 "last_loaded": (
@@ -406,9 +694,7 @@ class DatabaseACLManager:
     async def get_all_users(self, db: AsyncSession) -> List[Dict]:
         """Get all users"""
         try:
-            result = await db.execute(
-                select(ACLUser).options(selectinload(ACLUser.roles))
-            )
+            result = await db.execute(select(ACLUser).options(*USER_PERMISSION_LOAD))
             users = result.scalars().all()
 
             user_list = []
@@ -466,5 +752,6 @@ async def init_acl_manager() -> DatabaseACLManager:
     global acl_manager
     acl_manager = DatabaseACLManager()
     await acl_manager._load_config()
+    acl_manager.start()
     logger.info("Async database-backed ACL manager initialized")
     return acl_manager
@@ -3,12 +3,48 @@ Database manager for MQTT operations
 Helper functions for MQTT device, sensor reading, command, and session management
 """
 
-from sqlalchemy import select, delete, func
+import asyncio
+import logging
+import time
+import weakref
+
+from cachetools import TTLCache
+from sqlalchemy import (
+    BigInteger,
+    DateTime,
+    Integer,
+    Text,
+    case,
+    cast,
+    column,
+    event,
+    select,
+    table,
+    delete,
+    func,
+    insert,
+    lambda_stmt,
+    literal,
+    union_all,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
-from typing import Dict, Any, List, Optional
+from sqlalchemy.orm import Session, raiseload, selectinload
+from typing import (
+    Any,
+    AsyncIterator,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+)
 from datetime import datetime, timezone, timedelta
 
+from app.database import SessionLocal, json_dumps
+from app.managers.batching import BatchLoader
+
 from app.models.mqtt_models import (
     MQTTDevice,
     MQTTSensorReading,
@@ -19,47 +55,290 @@ from app.models.mqtt_models import (
 from app.models.ss_models import SSSensor, SSSensorType
 from app.models.acl_models import ACLUser
 
+logger = logging.getLogger(__name__)
+
+# device_data keys -> MQTTDevice columns they update
+DEVICE_DATA_COLUMNS = {
+    "name": "device_name",
+    "type": "device_type",
+    "location": "location",
+    "description": "description",
+}
+
+# device_id -> device pk, so known devices skip the upsert on the hot path
+_device_pk_cache: TTLCache = TTLCache(maxsize=10_000, ttl=60)
+_device_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = (
+    weakref.WeakValueDictionary()
+)
+
+# device pk -> latest last_seen (epoch), written in one UPDATE per interval
+_pending_last_seen: Dict[int, float] = {}
+_last_seen_task: Optional[asyncio.Task] = None
+_last_seen_stop: Optional[asyncio.Event] = None  # Set to end the flush loop
+LAST_SEEN_FLUSH_INTERVAL = 5.0
+
+# Reading columns in MQTTSensorReading.to_dict order; list endpoints select these
+# as plain rows and hand them to orjson instead of hydrating ORM objects
+READING_COLUMNS = (
+    MQTTSensorReading.id,
+    MQTTSensorReading.device_id,
+    MQTTSensorReading.sensor_id,
+    MQTTSensorReading.sensor_type.label("sensor_type_id"),
+    MQTTSensorReading.value,
+    MQTTSensorReading.unit,
+    MQTTSensorReading.timestamp,
+    MQTTSensorReading.mqtt_topic,
+    MQTTSensorReading.qos,
+    MQTTSensorReading.retain,
+    MQTTSensorReading.raw_data,
+    MQTTSensorReading.user_id,
+)
+# Related names to_dict(include_relationships=True) adds, joined in one query
+READING_DETAIL_COLUMNS = (
+    MQTTDevice.device_name,
+    MQTTSensorReading.device_str_id.label("device_identifier"),
+    SSSensor.sensor_id.label("sensor_identifier"),
+    SSSensor.pattern.label("sensor_pattern"),
+    SSSensorType.name.label("sensor_type_name"),
+    ACLUser.username,
+)
+
+# Relationships the list endpoints serialize, anything else raises on access
+# instead of lazy loading one row at a time
+COMMAND_RELATIONSHIPS = (
+    selectinload(MQTTCommand.device),
+    selectinload(MQTTCommand.user),
+    raiseload("*"),
+)
+SESSION_RELATIONSHIPS = (selectinload(MQTTSession.user), raiseload("*"))
+
+# Planner row estimates, used instead of count(*) scans on big tables
+_pg_class = table("pg_class", column("oid"), column("reltuples"))
+EXACT_COUNT_LIMIT = 100_000  # Below this estimate the exact count is cheap
+
+# get_mqtt_statistics result and when it was computed (monotonic seconds)
+_stats_cache: Optional[Tuple[float, Dict[str, Any]]] = None
+STATS_CACHE_TTL = 30.0
+
+# Rows fetched per server-side cursor round-trip in stream_device_readings
+READING_STREAM_CHUNK = 1000
+
+# Batches this large go through COPY instead of INSERT
+READING_COPY_THRESHOLD = 100
+READING_COPY_COLUMNS = (
+    "id",
+    "device_id",
+    "device_str_id",
+    "sensor_id",
+    "sensor_type",
+    "value",
+    "unit",
+    "timestamp",
+    "mqtt_topic",
+    "qos",
+    "retain",
+    "raw_data",
+    "user_id",
+)
+
 
 async def create_or_update_device(
     db: AsyncSession, device_id: str, device_data: Dict[str, Any] = None
 ) -> MQTTDevice:
     """Create or update a device, return the device object"""
-    results = await db.execute(
-        select(MQTTDevice).where(MQTTDevice.device_id == device_id)
+    device_data = device_data or {}
+
+    stmt = pg_insert(MQTTDevice).values(
+        device_id=device_id,
+        device_name=device_data.get("name", device_id),
+        device_type=device_data.get("type", "unknown"),
+        location=device_data.get("location"),
+        description=device_data.get("description"),
+        is_active=True,
+        last_seen=func.now(),
+        meta_data=device_data or None,
     )
-    device = results.scalars().first()
 
-    if not device:
-        device = MQTTDevice(
-            device_id=device_id,
-            device_name=(
-                device_data.get("name", device_id) if device_data else device_id
-            ),
-            device_type=(
-                device_data.get("type", "unknown") if device_data else "unknown"
-            ),
-            location=device_data.get("location") if device_data else None,
-            description=device_data.get("description") if device_data else None,
-            is_active=True,
-            last_seen=datetime.now(timezone.utc),
-            meta_data=device_data,
+    # On conflict only touch last_seen and the fields the caller passed in
+    # (ON CONFLICT skips column onupdate defaults, so set updated_at here)
+    set_cols = {"last_seen": stmt.excluded.last_seen, "updated_at": func.now()}
+    if device_data:
+        for key, col_name in DEVICE_DATA_COLUMNS.items():
+            if key in device_data:
+                set_cols[col_name] = stmt.excluded[col_name]
+        set_cols["meta_data"] = stmt.excluded.meta_data
+
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MQTTDevice.device_id], set_=set_cols
+    ).returning(MQTTDevice)
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    device = result.scalar_one()
+    _remember_device_pks(db, {device_id: device.id})
+    return device
+
+
+def _remember_device_pks(db: AsyncSession, pks: Dict[str, int]):
+    """Stage device pks, they reach the cache once the session commits"""
+    db.info.setdefault("device_pks", {}).update(pks)
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_device_pks(session):
+    pks = session.info.pop("device_pks", None)
+    if pks:
+        _device_pk_cache.update(pks)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_staged_device_pks(session):
+    session.info.pop("device_pks", None)
+
+
+async def get_device_pk(db: AsyncSession, device_id: str) -> int:
+    """Return the pk of a device, creating it on first sight
+
+    Cached devices only get their last_seen queued for the next flush.
+    """
+    pk = _device_pk_cache.get(device_id) or db.info.get("device_pks", {}).get(device_id)
+    if pk is None:
+        lock = _device_locks.get(device_id)
+        if lock is None:
+            lock = _device_locks[device_id] = asyncio.Lock()
+        async with lock:
+            pk = _device_pk_cache.get(device_id)
+            if pk is None:
+                pk = await _device_loader.load(device_id)
+                if pk is None:
+                    return (await create_or_update_device(db, device_id)).id
+                _device_pk_cache[device_id] = pk
+    _pending_last_seen[pk] = time.time()
+    return pk
+
+
+async def _load_device_pks(device_ids: List[str]) -> Dict[str, int]:
+    """Map the given device_ids to pks with one IN query"""
+    async with SessionLocal() as session:
+        result = await session.execute(
+            select(MQTTDevice.device_id, MQTTDevice.id).where(
+                MQTTDevice.device_id.in_(device_ids)
+            )
         )
-        db.add(device)
-        await db.flush()
-    else:
-        device.last_seen = datetime.now(timezone.utc)
-        if device_data:
-            if "name" in device_data:
-                device.device_name = device_data["name"]
-            if "type" in device_data:
-                device.device_type = device_data["type"]
-            if "location" in device_data:
-                device.location = device_data["location"]
-            if "description" in device_data:
-                device.description = device_data["description"]
-            device.meta_data = device_data
+        return dict(result.all())
+
+
+# Tables a store call references by id, and the error for a missing one
+REFERENCE_MODELS = {"sensor": SSSensor, "sensor_type": SSSensorType, "user": ACLUser}
+REFERENCE_ERRORS = {
+    "sensor": "Sensor with id {} not found",
+    "sensor_type": "Sensor type with id {} not found",
+    "user": "User with id {} not found",
+}
+
+
+async def _load_references(refs: List[Tuple[str, int]]) -> Dict[Tuple[str, int], bool]:
+    """Check which (kind, id) references exist, one UNION ALL for all kinds"""
+    ids: Dict[str, List[int]] = {}
+    for kind, ref_id in refs:
+        ids.setdefault(kind, []).append(ref_id)
+    query = union_all(
+        *(
+            select(literal(kind).label("kind"), model.id).where(model.id.in_(ids[kind]))
+            for kind, model in REFERENCE_MODELS.items()
+            if kind in ids
+        )
+    )
+    async with SessionLocal() as session:
+        result = await session.execute(query)
+        return {(kind, ref_id): True for kind, ref_id in result.all()}
+
+
+_device_loader = BatchLoader(_load_device_pks)
+_reference_loader = BatchLoader(_load_references)
+
+# (kind, id) references known to exist, skips the check on the hot path
+_known_references: TTLCache = TTLCache(maxsize=50_000, ttl=60)
+
+
+async def _verify_references(db: AsyncSession, *refs: Tuple[str, int]):
+    """Raise ValueError for the first (kind, id) reference that doesn't exist
+
+    The batched check runs in its own session, so a miss is checked again in
+    the caller's, where rows it hasn't committed yet are visible.
+    """
+    missing = [ref for ref in refs if ref not in _known_references]
+    if not missing:
+        return
+    found = await asyncio.gather(*(_reference_loader.load(ref) for ref in missing))
+    for (kind, ref_id), ok in zip(missing, found):
+        if not ok:
+            model = REFERENCE_MODELS[kind]
+            if await db.scalar(select(model.id).where(model.id == ref_id)) is None:
+                raise ValueError(REFERENCE_ERRORS[kind].format(ref_id))
+            # Not cached, the row may still be rolled back with the caller
+            continue
+        _known_references[(kind, ref_id)] = True
+
+
+async def _flush_last_seen():
+    """Write the queued last_seen values with one UPDATE .. FROM (VALUES ..)"""
+    global _pending_last_seen
+    if not _pending_last_seen:
+        return
+    pending, _pending_last_seen = _pending_last_seen, {}
+    seen = values(
+        column("id", Integer),
+        column("last_seen", DateTime(timezone=True)),
+        name="seen",
+    ).data(
+        [(pk, datetime.fromtimestamp(ts, timezone.utc)) for pk, ts in pending.items()]
+    )
+    try:
+        async with SessionLocal() as db:
+            await db.execute(
+                update(MQTTDevice.__table__)
+                .where(MQTTDevice.__table__.c.id == seen.c.id)
+                .values(
+                    last_seen=func.greatest(
+                        MQTTDevice.__table__.c.last_seen, seen.c.last_seen
+                    )
+                )
+            )
+            await db.commit()
+    except Exception as e:
+        logger.error(f"Error updating last_seen for {len(pending)} devices: {e}")
 
-    return device
+
+async def _last_seen_loop(stop: asyncio.Event):
+    """Periodically flush the coalesced last_seen updates until stop is set
+
+    Only the wait is interruptible, a flush that has started always finishes.
+    """
+    while True:
+        try:
+            await asyncio.wait_for(stop.wait(), LAST_SEEN_FLUSH_INTERVAL)
+            return
+        except asyncio.TimeoutError:
+            await _flush_last_seen()
+
+
+def start_last_seen_writer():
+    """Start the background flush of coalesced device last_seen values"""
+    global _last_seen_task, _last_seen_stop
+    if _last_seen_task is None:
+        _last_seen_stop = asyncio.Event()
+        _last_seen_task = asyncio.create_task(_last_seen_loop(_last_seen_stop))
+
+
+async def stop_last_seen_writer():
+    """Stop the last_seen flush loop and write what is still pending"""
+    global _last_seen_task
+    if _last_seen_task is None:
+        return
+    task, _last_seen_task = _last_seen_task, None
+    # Let a flush in progress finish instead of cancelling it mid-write
+    _last_seen_stop.set()
+    await task
+    await _flush_last_seen()
 
 
 async def store_sensor_reading(
@@ -75,35 +354,48 @@ async def store_sensor_reading(
     qos: int = 1,
     retain: bool = False,
     timestamp: datetime = None,
+    eager: bool = False,
+    flush: bool = False,
 ) -> MQTTSensorReading:
-    """Store a sensor reading in the database"""
+    """Store a sensor reading in the database
 
-    # Create or update device
-    device = await create_or_update_device(db, device_id)
+    The row is only written when the caller flushes or commits, unless
+    flush (or eager, which needs the id) is set.
+    """
 
-    # Verify sensor exists
-    sensor_result = await db.execute(select(SSSensor).where(SSSensor.id == sensor_id))
-    sensor = sensor_result.scalars().first()
-    if not sensor:
-        raise ValueError(f"Sensor with id {sensor_id} not found")
+    # Resolve (or create) the device
+    device_pk = await get_device_pk(db, device_id)
 
-    # Verify sensor type exists
-    sensor_type_result = await db.execute(
-        select(SSSensorType).where(SSSensorType.id == sensor_type_id)
-    )
-    sensor_type = sensor_type_result.scalars().first()
-    if not sensor_type:
-        raise ValueError(f"Sensor type with id {sensor_type_id} not found")
-
-    # Verify user exists
-    user_result = await db.execute(select(ACLUser).where(ACLUser.id == user_id))
-    user = user_result.scalars().first()
-    if not user:
-        raise ValueError(f"User with id {user_id} not found")
+    # Eager callers get the related objects from the same query that
+    # verifies them, otherwise the cached/batched reference check is enough
+    related = None
+    if eager:
+        related = (
+            await db.execute(
+                lambda_stmt(
+                    lambda: select(MQTTDevice, SSSensor, SSSensorType, ACLUser).where(
+                        MQTTDevice.id == device_pk,
+                        SSSensor.id == sensor_id,
+                        SSSensorType.id == sensor_type_id,
+                        ACLUser.id == user_id,
+                    )
+                )
+            )
+        ).first()
+
+    if related is None:
+        await _verify_references(
+            db,
+            ("sensor", sensor_id),
+            ("sensor_type", sensor_type_id),
+            ("user", user_id),
+        )
 
-    # Create sensor reading
+    # Create sensor reading. Stamped here rather than relying on the column's
+    # server default, which tables created before it was added don't have.
     reading = MQTTSensorReading(
-        device_id=device.id,
+        device_id=device_pk,
+        device_str_id=device_id,
         sensor_id=sensor_id,
         sensor_type=sensor_type_id,
         value=value,
@@ -116,15 +408,147 @@ async def store_sensor_reading(
         user_id=user_id,
     )
 
-    db.add(reading)
-    await db.flush()
+    # Optionally attach relationships for immediate use
+    if related is not None:
+        (
+            reading.device,
+            reading.sensor,
+            reading.sensor_type_obj,
+            reading.user,
+        ) = related
 
-    # Optionally eager load relationships for immediate use
-    await db.refresh(reading, ["device", "sensor", "sensor_type_obj", "user"])
+    db.add(reading)
+    if flush or eager:
+        await db.flush()
 
     return reading
 
 
+async def store_sensor_readings_bulk(
+    db: AsyncSession, readings: List[Dict[str, Any]]
+) -> List[int]:
+    """Store many sensor readings at once, return the new reading ids
+
+    Each reading is a dict with the store_sensor_reading arguments (device_id,
+    sensor_id, sensor_type_id, value, unit, topic, user_id and optionally
+    raw_data, qos, retain, timestamp). Raises ValueError for the first
+    sensor/type/user id that doesn't exist, before anything is written.
+    """
+    if not readings:
+        return []
+
+    # Each distinct reference is checked once, however many readings share it
+    refs = {}
+    for r in readings:
+        for ref in (
+            ("sensor", r["sensor_id"]),
+            ("sensor_type", r["sensor_type_id"]),
+            ("user", r["user_id"]),
+        ):
+            refs.setdefault(ref, None)
+    await _verify_references(db, *refs)
+
+    now = datetime.now(timezone.utc)
+
+    # Upsert every device in the batch and get all their ids in one statement
+    device_ids = sorted({r["device_id"] for r in readings})
+    device_stmt = pg_insert(MQTTDevice).values(
+        [
+            {
+                "device_id": device_id,
+                "device_name": device_id,
+                "device_type": "unknown",
+                "is_active": True,
+                "last_seen": func.now(),
+            }
+            for device_id in device_ids
+        ]
+    )
+    device_stmt = device_stmt.on_conflict_do_update(
+        index_elements=[MQTTDevice.device_id],
+        # ON CONFLICT skips column onupdate defaults, so set updated_at here
+        set_={"last_seen": device_stmt.excluded.last_seen, "updated_at": func.now()},
+    ).returning(MQTTDevice.device_id, MQTTDevice.id)
+    device_pks = dict((await db.execute(device_stmt)).all())
+    _remember_device_pks(db, device_pks)
+
+    rows = [
+        {
+            "device_id": device_pks[r["device_id"]],
+            "device_str_id": r["device_id"],
+            "sensor_id": r["sensor_id"],
+            "sensor_type": r["sensor_type_id"],
+            "value": r["value"],
+            "unit": r["unit"],
+            "timestamp": r.get("timestamp") or now,
+            "mqtt_topic": r["topic"],
+            "qos": r.get("qos", 1),
+            "retain": r.get("retain", False),
+            "raw_data": r.get("raw_data"),
+            "user_id": r["user_id"],
+        }
+        for r in readings
+    ]
+
+    conn = await db.connection()
+    if len(rows) >= READING_COPY_THRESHOLD and conn.dialect.name == "postgresql":
+        return await _copy_sensor_readings(conn, rows)
+
+    # Core executemany on the table: no ORM bulk handling, one cached compiled
+    # statement, and insertmanyvalues pages it into multi-row INSERTs
+    readings_table = MQTTSensorReading.__table__
+    result = await db.execute(
+        insert(readings_table).returning(
+            readings_table.c.id, sort_by_parameter_order=True
+        ),
+        rows,
+    )
+    return list(result.scalars())
+
+
+async def _copy_sensor_readings(conn, rows: List[Dict[str, Any]]) -> List[int]:
+    """COPY readings into the table on the session's connection and transaction"""
+    # COPY returns nothing, so take the ids from the sequence up front
+    ids = (
+        (
+            await conn.execute(
+                select(func.nextval("mqtt_sensor_readings_id_seq")).select_from(
+                    func.generate_series(1, len(rows))
+                )
+            )
+        )
+        .scalars()
+        .all()
+    )
+
+    records = [
+        (
+            reading_id,
+            r["device_id"],
+            r["device_str_id"],
+            r["sensor_id"],
+            r["sensor_type"],
+            r["value"],
+            r["unit"],
+            r["timestamp"],
+            r["mqtt_topic"],
+            r["qos"],
+            r["retain"],
+            json_dumps(r["raw_data"]),
+            r["user_id"],
+        )
+        for reading_id, r in zip(ids, rows)
+    ]
+
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        MQTTSensorReading.__tablename__,
+        records=records,
+        columns=READING_COPY_COLUMNS,
+    )
+    return list(ids)
+
+
 async def store_command(
     db: AsyncSession,
     device_id: str,
@@ -134,21 +558,22 @@ async def store_command(
     user_id: int,
     qos: int = 1,
     retain: bool = False,
+    flush: bool = False,
 ) -> MQTTCommand:
-    """Store a command in the database"""
+    """Store a command in the database, flush to get its id and relationships"""
 
-    # Create or update device
-    device = await create_or_update_device(db, device_id)
+    # Resolve (or create) the device
+    device_pk = await get_device_pk(db, device_id)
 
     # Verify user exists
-    user_result = await db.execute(select(ACLUser).where(ACLUser.id == user_id))
-    user = user_result.scalars().first()
+    user = await db.get(ACLUser, user_id)
     if not user:
         raise ValueError(f"User with id {user_id} not found")
 
     # Create command
     cmd = MQTTCommand(
-        device_id=device.id,
+        device_id=device_pk,
+        device_str_id=device_id,
         command=command,
         parameters=parameters,
         mqtt_topic=topic,
@@ -159,10 +584,12 @@ async def store_command(
     )
 
     db.add(cmd)
-    await db.flush()
 
-    # Optionally eager load relationships for immediate use
-    await db.refresh(cmd, ["device", "user"])
+    # Optionally attach relationships and get the id for immediate use
+    if flush:
+        cmd.user = user
+        cmd.device = await db.get(MQTTDevice, device_pk)
+        await db.flush()
 
     return cmd
 
@@ -173,29 +600,38 @@ async def update_command_status(
     status: str,
     response_data: Dict[str, Any] = None,
     error_message: str = None,
+    include_relationships: bool = False,
 ) -> MQTTCommand:
-    """Update the status of a command"""
-    result = await db.execute(select(MQTTCommand).where(MQTTCommand.id == command_id))
-    cmd = result.scalars().first()
-
-    if not cmd:
-        raise ValueError(f"Command with id {command_id} not found")
-
-    cmd.status = status
+    """Update the status of a command with one UPDATE .. RETURNING"""
+    changes: Dict[str, Any] = {"status": status}
 
     if status == "acknowledged":
-        cmd.acknowledged_at = datetime.now(timezone.utc)
+        changes["acknowledged_at"] = func.now()
     elif status == "executed":
-        cmd.executed_at = datetime.now(timezone.utc)
+        changes["executed_at"] = func.now()
 
     if response_data:
-        cmd.response_data = response_data
+        changes["response_data"] = response_data
 
     if error_message:
-        cmd.error_message = error_message
-        cmd.status = "failed"
+        changes["error_message"] = error_message
+        changes["status"] = "failed"
+
+    stmt = (
+        update(MQTTCommand)
+        .where(MQTTCommand.id == command_id)
+        .values(**changes)
+        .returning(MQTTCommand)
+    )
+    if include_relationships:
+        stmt = stmt.options(*COMMAND_RELATIONSHIPS)
+
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    cmd = result.scalar_one_or_none()
+
+    if not cmd:
+        raise ValueError(f"Command with id {command_id} not found")
 
-    await db.flush()
     return cmd
 
 
@@ -207,12 +643,12 @@ async def create_mqtt_session(
     user_agent: str = None,
     subscribed_topics: List[str] = None,
     connection_metadata: Dict[str, Any] = None,
+    flush: bool = False,
 ) -> MQTTSession:
-    """Create a new MQTT session"""
+    """Create a new MQTT session, flush to get its id and user"""
 
     # Verify user exists
-    user_result = await db.execute(select(ACLUser).where(ACLUser.id == user_id))
-    user = user_result.scalars().first()
+    user = await db.get(ACLUser, user_id)
     if not user:
         raise ValueError(f"User with id {user_id} not found")
 
@@ -231,8 +667,9 @@ async def create_mqtt_session(
     # Update user's last login
     user.last_login = datetime.now(timezone.utc)
 
-    await db.flush()
-    await db.refresh(session, ["user"])
+    session.user = user
+    if flush:
+        await db.flush()
     return session
 
 
@@ -240,31 +677,30 @@ async def close_mqtt_session(
     db: AsyncSession,
     session_id: int = None,
     client_id: str = None,
+    flush: bool = False,
 ) -> MQTTSession:
     """Close an MQTT session by ID or client_id"""
 
     if session_id:
-        result = await db.execute(
-            select(MQTTSession).where(MQTTSession.id == session_id)
-        )
+        session = await db.get(MQTTSession, session_id)
     elif client_id:
         result = await db.execute(
             select(MQTTSession).where(
                 MQTTSession.client_id == client_id, MQTTSession.is_active == True
             )
         )
+        session = result.scalars().first()
     else:
         raise ValueError("Either session_id or client_id must be provided")
 
-    session = result.scalars().first()
-
     if not session:
         raise ValueError("Session not found")
 
     session.is_active = False
     session.disconnected_at = datetime.now(timezone.utc)
 
-    await db.flush()
+    if flush:
+        await db.flush()
     return session
 
 
@@ -272,11 +708,11 @@ async def update_session_activity(
     db: AsyncSession,
     session_id: int,
     subscribed_topics: List[str] = None,
+    flush: bool = False,
 ) -> MQTTSession:
     """Update session last activity and optionally subscribed topics"""
 
-    result = await db.execute(select(MQTTSession).where(MQTTSession.id == session_id))
-    session = result.scalars().first()
+    session = await db.get(MQTTSession, session_id)
 
     if not session:
         raise ValueError(f"Session with id {session_id} not found")
@@ -286,10 +722,46 @@ async def update_session_activity(
     if subscribed_topics is not None:
         session.subscribed_topics = subscribed_topics
 
-    await db.flush()
+    if flush:
+        await db.flush()
     return session
 
 
+async def add_subscription(db: AsyncSession, session_id: int, topic: str) -> bool:
+    """Append a topic to a session's subscriptions in SQL, False if no session"""
+    topics = func.coalesce(MQTTSession.subscribed_topics, cast([], JSONB))
+    new_topic = cast([topic], JSONB)
+    result = await db.execute(
+        update(MQTTSession)
+        .where(MQTTSession.id == session_id)
+        .values(
+            subscribed_topics=case(
+                (topics.contains(new_topic), topics),
+                else_=topics.op("||")(new_topic),
+            ),
+            last_activity=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+async def remove_subscription(db: AsyncSession, session_id: int, topic: str) -> bool:
+    """Remove a topic from a session's subscriptions in SQL, False if no session"""
+    result = await db.execute(
+        update(MQTTSession)
+        .where(MQTTSession.id == session_id)
+        .values(
+            subscribed_topics=MQTTSession.subscribed_topics.op("-", return_type=JSONB)(
+                literal(topic, Text)
+            ),
+            last_activity=func.now(),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
 async def update_topic_stats(
     db: AsyncSession,
     topic_pattern: str,
@@ -301,151 +773,133 @@ async def update_topic_stats(
     avg_qos: float = 0.0,
 ) -> MQTTTopicStats:
     """Create or update topic statistics for a given date"""
-
-    # Try to find existing stats for this topic and date
-    result = await db.execute(
-        select(MQTTTopicStats).where(
-            MQTTTopicStats.topic_pattern == topic_pattern,
-            MQTTTopicStats.date == date.date(),
-        )
+    stmt = pg_insert(MQTTTopicStats).values(
+        topic_pattern=topic_pattern,
+        date=date.date(),
+        message_count=message_count,
+        subscriber_count=subscriber_count,
+        publisher_count=publisher_count,
+        total_bytes=total_bytes,
+        avg_qos=avg_qos,
     )
-    stats = result.scalars().first()
-
-    if not stats:
-        stats = MQTTTopicStats(
-            topic_pattern=topic_pattern,
-            date=date.date(),
-            message_count=message_count,
-            subscriber_count=subscriber_count,
-            publisher_count=publisher_count,
-            total_bytes=total_bytes,
-            avg_qos=avg_qos,
-        )
-        db.add(stats)
-    else:
-        # Update existing stats
-        stats.message_count += message_count
-        stats.subscriber_count = max(stats.subscriber_count, subscriber_count)
-        stats.publisher_count = max(stats.publisher_count, publisher_count)
-        stats.total_bytes += total_bytes
-        # Recalculate average QoS
-        if message_count > 0:
-            total_messages = stats.message_count
-            stats.avg_qos = (
-                (stats.avg_qos * (total_messages - message_count))
-                + (avg_qos * message_count)
-            ) / total_messages
-
-    await db.flush()
-    return stats
+
+    # Accumulate in SQL so concurrent updates of the same row don't lose counts
+    total_messages = MQTTTopicStats.message_count + message_count
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[MQTTTopicStats.topic_pattern, MQTTTopicStats.date],
+        set_={
+            "message_count": total_messages,
+            "subscriber_count": func.greatest(
+                MQTTTopicStats.subscriber_count, subscriber_count
+            ),
+            "publisher_count": func.greatest(
+                MQTTTopicStats.publisher_count, publisher_count
+            ),
+            "total_bytes": MQTTTopicStats.total_bytes + total_bytes,
+            # Recalculate average QoS
+            "avg_qos": (
+                (
+                    MQTTTopicStats.avg_qos * MQTTTopicStats.message_count
+                    + avg_qos * message_count
+                )
+                / total_messages
+                if message_count > 0
+                else MQTTTopicStats.avg_qos
+            ),
+        },
+    ).returning(MQTTTopicStats)
+
+    result = await db.execute(stmt, execution_options={"populate_existing": True})
+    return result.scalar_one()
 
 
 async def get_device_by_id(db: AsyncSession, device_id: str) -> Optional[MQTTDevice]:
     """Get a device by its device_id"""
+    pk = _device_pk_cache.get(device_id)
+    if pk is not None:
+        return await db.get(MQTTDevice, pk)
+    # lambda_stmt reuses the built statement and cache key between calls
     result = await db.execute(
-        select(MQTTDevice).where(MQTTDevice.device_id == device_id)
+        lambda_stmt(lambda: select(MQTTDevice).where(MQTTDevice.device_id == device_id))
     )
-    return result.scalars().first()
-
-
-async def get_device_by_id_with_stats(
-    db: AsyncSession, device_id: str
-) -> Optional[Dict[str, Any]]:
-    """Get a device by its device_id with statistics"""
-    device = await get_device_by_id(db, device_id)
+    device = result.scalars().first()
+    if device:
+        _remember_device_pks(db, {device_id: device.id})
+    return device
 
-    if not device:
-        return None
 
-    device_dict = device.to_dict(include_relationships=False)
+def _select_devices_with_stats():
+    """Select devices with reading/command counts and latest reading time
 
-    # Get reading count
+    The stats are correlated subqueries, so each device is served by index
+    lookups in the same round-trip instead of three extra queries.
+    """
     reading_count = (
-        await db.execute(
-            select(func.count(MQTTSensorReading.id)).where(
-                MQTTSensorReading.device_id == device.id
-            )
-        )
-    ).scalar()
-
-    # Get command count
+        select(func.count())
+        .where(MQTTSensorReading.device_id == MQTTDevice.id)
+        .scalar_subquery()
+    )
+    latest_reading = (
+        select(func.max(MQTTSensorReading.timestamp))
+        .where(MQTTSensorReading.device_id == MQTTDevice.id)
+        .scalar_subquery()
+    )
     command_count = (
-        await db.execute(
-            select(func.count(MQTTCommand.id)).where(MQTTCommand.device_id == device.id)
-        )
-    ).scalar()
-
-    # Get latest reading
-    latest_query = await db.execute(
-        select(MQTTSensorReading)
-        .where(MQTTSensorReading.device_id == device.id)
-        .order_by(MQTTSensorReading.timestamp.desc())
-        .limit(1)
+        select(func.count())
+        .where(MQTTCommand.device_id == MQTTDevice.id)
+        .scalar_subquery()
     )
-    latest = latest_query.scalars().first()
+    return select(MQTTDevice, reading_count, command_count, latest_reading)
+
 
+def _device_stats_dict(device, reading_count, command_count, latest) -> Dict[str, Any]:
+    device_dict = device.to_dict(include_relationships=False)
     device_dict["sensor_readings_count"] = reading_count or 0
     device_dict["commands_count"] = command_count or 0
-    device_dict["latest_reading"] = latest.timestamp.isoformat() if latest else None
-
+    device_dict["latest_reading"] = latest.isoformat() if latest else None
     return device_dict
 
 
+async def get_device_by_id_with_stats(
+    db: AsyncSession, device_id: str
+) -> Optional[Dict[str, Any]]:
+    """Get a device by its device_id with statistics"""
+    result = await db.execute(
+        _select_devices_with_stats().where(MQTTDevice.device_id == device_id)
+    )
+    row = result.first()
+    return _device_stats_dict(*row) if row else None
+
+
 async def get_all_devices(
     db: AsyncSession, active_only: bool = False, include_stats: bool = False
 ) -> List[Dict[str, Any]]:
     """Get all devices, optionally filtered by active status and with statistics"""
-    query = select(MQTTDevice)
+    query = _select_devices_with_stats() if include_stats else select(MQTTDevice)
 
     if active_only:
         query = query.where(MQTTDevice.is_active == True)
 
     query = query.order_by(MQTTDevice.device_name)
     result = await db.execute(query)
-    devices = result.scalars().all()
 
     if not include_stats:
-        return devices
-
-    # Include statistics for each device
-    devices_with_stats = []
-    for device in devices:
-        device_dict = device.to_dict(include_relationships=False)
-
-        # Get latest reading
-        latest_query = await db.execute(
-            select(MQTTSensorReading)
-            .where(MQTTSensorReading.device_id == device.id)
-            .order_by(MQTTSensorReading.timestamp.desc())
-            .limit(1)
-        )
-        latest = latest_query.scalars().first()
-
-        # Get reading count
-        reading_count = (
-            await db.execute(
-                select(func.count(MQTTSensorReading.id)).where(
-                    MQTTSensorReading.device_id == device.id
-                )
-            )
-        ).scalar()
+        return result.scalars().all()
 
-        # Get command count
-        command_count = (
-            await db.execute(
-                select(func.count(MQTTCommand.id)).where(
-                    MQTTCommand.device_id == device.id
-                )
-            )
-        ).scalar()
-
-        device_dict["sensor_readings_count"] = reading_count or 0
-        device_dict["commands_count"] = command_count or 0
-        device_dict["latest_reading"] = latest.timestamp.isoformat() if latest else None
+    return [_device_stats_dict(*row) for row in result.all()]
 
-        devices_with_stats.append(device_dict)
 
-    return devices_with_stats
+def _select_reading_rows(include_relationships: bool):
+    """Column select of readings, joined to the related names when requested"""
+    if not include_relationships:
+        return select(*READING_COLUMNS)
+    return (
+        select(*READING_COLUMNS, *READING_DETAIL_COLUMNS)
+        .outerjoin(MQTTDevice, MQTTDevice.id == MQTTSensorReading.device_id)
+        .outerjoin(SSSensor, SSSensor.id == MQTTSensorReading.sensor_id)
+        .outerjoin(SSSensorType, SSSensorType.id == MQTTSensorReading.sensor_type)
+        .outerjoin(ACLUser, ACLUser.id == MQTTSensorReading.user_id)
+    )
 
 
 async def get_device_readings(
@@ -453,39 +907,91 @@ async def get_device_readings(
     device_id: str,
     limit: int = 100,
     include_relationships: bool = True,
-) -> List[MQTTSensorReading]:
-    """Get sensor readings for a specific device"""
+    before: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Get sensor readings for a specific device as row dicts, older than before"""
     device = await get_device_by_id(db, device_id)
     if not device:
         raise ValueError(f"Device {device_id} not found")
 
-    query = select(MQTTSensorReading).where(MQTTSensorReading.device_id == device.id)
+    query = _select_reading_rows(include_relationships).where(
+        MQTTSensorReading.device_id == device.id
+    )
 
-    if include_relationships:
-        query = query.options(
-            selectinload(MQTTSensorReading.device),
-            selectinload(MQTTSensorReading.sensor),
-            selectinload(MQTTSensorReading.sensor_type_obj),
-            selectinload(MQTTSensorReading.user),
-        )
+    # Keyset pagination, served by the (device_id, timestamp) index
+    if before is not None:
+        query = query.where(MQTTSensorReading.timestamp < before)
 
     query = query.order_by(MQTTSensorReading.timestamp.desc()).limit(limit)
 
     result = await db.execute(query)
-    return result.scalars().all()
+    return [dict(row._mapping) for row in result]
+
+
+async def stream_device_readings(
+    db: AsyncSession,
+    device_id: str,
+    since: Optional[datetime] = None,
+    before: Optional[datetime] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Yield all readings of a device as row dicts, newest first, without buffering
+
+    Rows come from a server-side cursor in chunks of READING_STREAM_CHUNK,
+    so memory stays flat however many readings the device has.
+    """
+    device = await get_device_by_id(db, device_id)
+    if not device:
+        raise ValueError(f"Device {device_id} not found")
+
+    query = (
+        _select_reading_rows(include_relationships=False)
+        .where(MQTTSensorReading.device_id == device.id)
+        .order_by(MQTTSensorReading.timestamp.desc())
+        .execution_options(yield_per=READING_STREAM_CHUNK)
+    )
+    if since is not None:
+        query = query.where(MQTTSensorReading.timestamp >= since)
+    if before is not None:
+        query = query.where(MQTTSensorReading.timestamp < before)
+
+    async for row in await db.stream(query):
+        yield dict(row._mapping)
+
+
+async def get_recent_readings(
+    db: AsyncSession,
+    limit: int = 20,
+    include_relationships: bool = True,
+    before: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Get the latest sensor readings across all devices as row dicts"""
+    query = _select_reading_rows(include_relationships)
+
+    if before is not None:
+        query = query.where(MQTTSensorReading.timestamp < before)
+
+    query = query.order_by(MQTTSensorReading.timestamp.desc()).limit(limit)
+
+    result = await db.execute(query)
+    return [dict(row._mapping) for row in result]
 
 
 async def get_recent_commands(
-    db: AsyncSession, limit: int = 50, include_relationships: bool = True
+    db: AsyncSession,
+    limit: int = 50,
+    include_relationships: bool = True,
+    before: Optional[datetime] = None,
 ) -> List[MQTTCommand]:
-    """Get recent commands"""
+    """Get recent commands, older than before if given"""
     query = select(MQTTCommand)
 
     if include_relationships:
-        query = query.options(
-            selectinload(MQTTCommand.device),
-            selectinload(MQTTCommand.user),
-        )
+        query = query.options(*COMMAND_RELATIONSHIPS)
+    else:
+        query = query.options(raiseload("*"))
+
+    if before is not None:
+        query = query.where(MQTTCommand.sent_at < before)
 
     query = query.order_by(MQTTCommand.sent_at.desc()).limit(limit)
 
@@ -498,8 +1004,9 @@ async def get_device_commands(
     device_id: str,
     limit: int = 50,
     include_relationships: bool = True,
+    before: Optional[datetime] = None,
 ) -> List[MQTTCommand]:
-    """Get commands for a specific device"""
+    """Get commands for a specific device, older than before if given"""
     device = await get_device_by_id(db, device_id)
     if not device:
         raise ValueError(f"Device {device_id} not found")
@@ -507,10 +1014,13 @@ async def get_device_commands(
     query = select(MQTTCommand).where(MQTTCommand.device_id == device.id)
 
     if include_relationships:
-        query = query.options(
-            selectinload(MQTTCommand.device),
-            selectinload(MQTTCommand.user),
-        )
+        query = query.options(*COMMAND_RELATIONSHIPS)
+    else:
+        query = query.options(raiseload("*"))
+
+    # Keyset pagination, served by the (device_id, sent_at) index
+    if before is not None:
+        query = query.where(MQTTCommand.sent_at < before)
 
     query = query.order_by(MQTTCommand.sent_at.desc()).limit(limit)
 
@@ -525,7 +1035,9 @@ async def get_active_sessions(
     query = select(MQTTSession).where(MQTTSession.is_active == True)
 
     if include_relationships:
-        query = query.options(selectinload(MQTTSession.user))
+        query = query.options(*SESSION_RELATIONSHIPS)
+    else:
+        query = query.options(raiseload("*"))
 
     query = query.order_by(MQTTSession.connected_at.desc())
 
@@ -549,42 +1061,43 @@ async def get_user_sessions(
 
 
 async def get_mqtt_statistics(db: AsyncSession) -> Dict[str, Any]:
-    """Get comprehensive MQTT system statistics"""
+    """Get comprehensive MQTT system statistics, cached for STATS_CACHE_TTL"""
+    global _stats_cache
+    if _stats_cache and time.monotonic() - _stats_cache[0] < STATS_CACHE_TTL:
+        return _stats_cache[1]
 
-    # Device counts
-    total_devices = (
-        await db.execute(select(func.count()).select_from(MQTTDevice))
-    ).scalar()
-
-    active_devices = (
-        await db.execute(select(func.count()).where(MQTTDevice.is_active == True))
-    ).scalar()
+    since_24h = datetime.now(timezone.utc) - timedelta(hours=24)
 
-    # Reading counts
-    total_readings = (
-        await db.execute(select(func.count()).select_from(MQTTSensorReading))
-    ).scalar()
+    def count(*where, table=None):
+        query = select(func.count())
+        if table is not None:
+            query = query.select_from(table)
+        return query.where(*where).scalar_subquery()
+
+    def approx_count(model):
+        # reltuples is -1 before the first ANALYZE and stale on small tables,
+        # so fall back to an exact count below EXACT_COUNT_LIMIT
+        estimate = (
+            select(cast(_pg_class.c.reltuples, BigInteger))
+            .where(_pg_class.c.oid == func.to_regclass(model.__tablename__))
+            .scalar_subquery()
+        )
+        return case((estimate >= EXACT_COUNT_LIMIT, estimate), else_=count(table=model))
 
-    since_24h = datetime.now(timezone.utc) - timedelta(hours=24)
-    readings_24h = (
+    # All counts as scalar subqueries of one statement, a single round-trip
+    counts = (
         await db.execute(
-            select(func.count()).where(MQTTSensorReading.timestamp >= since_24h)
+            select(
+                count(table=MQTTDevice).label("total_devices"),
+                count(MQTTDevice.is_active == True).label("active_devices"),
+                approx_count(MQTTSensorReading).label("total_readings"),
+                count(MQTTSensorReading.timestamp >= since_24h).label("readings_24h"),
+                approx_count(MQTTCommand).label("total_commands"),
+                count(MQTTCommand.sent_at >= since_24h).label("commands_24h"),
+                count(MQTTSession.is_active == True).label("active_sessions"),
+            )
         )
-    ).scalar()
-
-    # Command counts
-    total_commands = (
-        await db.execute(select(func.count()).select_from(MQTTCommand))
-    ).scalar()
-
-    commands_24h = (
-        await db.execute(select(func.count()).where(MQTTCommand.sent_at >= since_24h))
-    ).scalar()
-
-    # Active sessions
-    active_sessions = (
-        await db.execute(select(func.count()).where(MQTTSession.is_active == True))
-    ).scalar()
+    ).one()
 
     # Most active devices
     result = await db.execute(
@@ -603,13 +1116,6 @@ async def get_mqtt_statistics(db: AsyncSession) -> Dict[str, Any]:
         {"device_id": d, "device_name": n, "readings": c} for d, n, c in result.all()
     ]
 
-    return {
-        "total_devices": total_devices or 0,
-        "active_devices": active_devices or 0,
-        "total_readings": total_readings or 0,
-        "total_commands": total_commands or 0,
-        "readings_24h": readings_24h or 0,
-        "commands_24h": commands_24h or 0,
-        "active_sessions": active_sessions or 0,
-        "most_active_devices": most_active,
-    }
+    stats = {**counts._asdict(), "most_active_devices": most_active}
+    _stats_cache = (time.monotonic(), stats)
+    return stats
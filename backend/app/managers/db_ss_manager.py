@@ -3,13 +3,19 @@ Database-backed Sensor Security (SS) Manager for Smart Factory
 All methods now accept db session as parameter for proper lifecycle management
 """
 
+import asyncio
+import sys
 import traceback
 import logging
+from collections import defaultdict
+from dataclasses import dataclass
 from typing import Dict, List, Optional, Any, Tuple
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timezone
 
-from sqlalchemy import select, and_
-from sqlalchemy.orm import selectinload
+from cachetools import TTLCache
+from sqlalchemy import select, and_, delete, exists, func, insert, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import raiseload, selectinload
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.ss_models import (
@@ -21,9 +27,75 @@ from app.models.ss_models import (
 )
 
 from app.database import SessionLocal
+from app.managers.batching import BatchWriter
 
 logger = logging.getLogger(__name__)
 
+# Failures a read path degrades on: query errors, plus connection errors and
+# timeouts that asyncpg raises without wrapping them in SQLAlchemyError
+DB_ERRORS = (SQLAlchemyError, OSError, asyncio.TimeoutError)
+
+# Eager loads covering everything SSAlert.to_dict touches, anything else raises
+ALERT_RELATIONSHIPS = (
+    selectinload(SSAlert.sensor).options(
+        selectinload(SSSensor.sensor_type_obj), raiseload("*")
+    ),
+    raiseload("*"),
+)
+
+# Columns of the get_all_sensors listing, fetched as plain rows instead of ORM
+# objects so the response is built without per-instance to_dict calls
+SENSOR_LIST_COLUMNS = (
+    SSSensor.id,
+    SSSensor.sensor_id,
+    SSSensor.pattern,
+    func.coalesce(SSSensorType.name, "unknown").label("sensor_type"),
+    SSSensor.is_active,
+    SSSensor.selected_limit_id,
+    SSSensor.created_at,
+    SSSensor.updated_at,
+)
+LIMIT_LIST_COLUMNS = (
+    SSSensorLimit.id,
+    SSSensorLimit.name,
+    SSSensorLimit.upper_limit,
+    SSSensorLimit.lower_limit,
+    SSSensorLimit.unit,
+    SSSensorLimit.is_selected,
+    SSSensorLimit.created_at,
+    SSSensorLimit.updated_at,
+)
+ALERT_LIST_COLUMNS = (
+    SSAlert.id,
+    SSAlert.sensor_id,
+    SSAlert.alert_type,
+    SSAlert.triggered_value,
+    SSAlert.limit_value,
+    SSAlert.unit,
+    SSAlert.message,
+    SSAlert.is_resolved,
+    SSAlert.resolved_at,
+    SSAlert.triggered_at,
+    SSAlert.mqtt_topic,
+    SSAlert.raw_data,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SSConfigView:
+    """Parsed snapshot of the SS config values read on the hot path"""
+
+    alerts_enabled: bool = True
+    version: str = "unknown"
+
+    @classmethod
+    def from_config(cls, config: Dict[str, str]) -> "SSConfigView":
+        """Parse the raw key/value config rows"""
+        return cls(
+            alerts_enabled=config.get("enable_alerts", "true").lower() == "true",
+            version=config.get("version", "unknown"),
+        )
+
 
 class DatabaseSSManager:
     """Async Database-backed Sensor Security Manager with caching"""
@@ -31,43 +103,65 @@ class DatabaseSSManager:
     def __init__(self):
         self.last_loaded: Optional[datetime] = None
         self._config_cache: Dict[str, str] = {}
-        self._cache_timeout = timedelta(minutes=5)
-        # Sensor cache: sensor_id -> {'info': Dict, 'limits': Dict, 'ts': datetime}
-        self._sensor_cache: Dict[str, Dict] = {}
-        # Type cache: type_name -> Dict
-        self._type_cache: Dict[str, Dict] = {}
-        self._type_cache_ts: Optional[datetime] = None
-
-    async def _load_config(self):
+        self.config = SSConfigView()
+        # Sensor cache: sensor_id -> fields filled by _hydrate_sensor, bounded so
+        # unknown ids from misbehaving devices can't grow it without limit
+        self._sensor_cache: TTLCache = TTLCache(maxsize=10_000, ttl=300)
+        # Type cache: a single "all" entry holding type_name -> Dict
+        self._type_cache: TTLCache = TTLCache(maxsize=1, ttl=300)
+        # Alert rows waiting for the next bulk insert, off the message path
+        self._alert_writer = BatchWriter(SSAlert, "alert", drop_oldest=True)
+
+    async def _load_config(self, db: Optional[AsyncSession] = None):
         """Load SS configuration from database"""
+        if db is None:
+            async with SessionLocal() as db:
+                return await self._load_config(db)
+
         try:
             logger.info("Loading SS configuration from database")
 
             # Load configuration
-            session = SessionLocal()
-            async with session as db:
-                result = await db.execute(select(SSConfig))
-                configs = result.scalars().all()
-                self._config_cache = {config.key: config.value for config in configs}
+            configs = (await db.scalars(select(SSConfig))).all()
+            self._config_cache = {config.key: config.value for config in configs}
+            self.config = SSConfigView.from_config(self._config_cache)
 
-                self.last_loaded = datetime.now(timezone.utc)
+            self.last_loaded = datetime.now(timezone.utc)
 
-                # Count sensors and types for logging
-                sensor_count_result = await db.execute(
-                    select(SSSensor).where(SSSensor.is_active == True)
-                )
-                sensor_count = len(sensor_count_result.scalars().all())
+            # Count sensors and types for logging
+            sensor_count, type_count, _ = await self._count_summary(db)
 
-                type_count_result = await db.execute(select(SSSensorType))
-                type_count = len(type_count_result.scalars().all())
-
-                logger.info(
-                    f"SS loaded from database: {sensor_count} sensors, {type_count} types"
-                )
+            logger.info(
+                f"SS loaded from database: {sensor_count} sensors, {type_count} types"
+            )
 
         except Exception as e:
             logger.error(f"Error loading SS from database: {e}")
             self._config_cache = {}
+            self.config = SSConfigView()
+
+    def start(self):
+        """Start the background alert writer"""
+        self._alert_writer.start()
+
+    async def shutdown(self):
+        """Stop the alert writer and write out queued alerts"""
+        await self._alert_writer.stop()
+
+    async def _count_summary(self, db: AsyncSession) -> Tuple[int, int, int]:
+        """Count active sensors, sensor types and unresolved alerts in one query"""
+        result = await db.execute(
+            select(
+                select(func.count())
+                .where(SSSensor.is_active == True)
+                .scalar_subquery(),
+                select(func.count()).select_from(SSSensorType).scalar_subquery(),
+                select(func.count())
+                .where(SSAlert.is_resolved == False)
+                .scalar_subquery(),
+            )
+        )
+        return tuple(result.one())
 
     async def reload(self, db: AsyncSession):
         """Reload SS configuration from database"""
@@ -77,250 +171,320 @@ class DatabaseSSManager:
 
     async def _get_sensor(self, sensor_id: str, db: AsyncSession) -> Optional[SSSensor]:
         """Fetch sensor from DB with relationships"""
-        result = await db.execute(
+        return await db.scalar(
             select(SSSensor)
             .where(and_(SSSensor.sensor_id == sensor_id, SSSensor.is_active == True))
-            .options(selectinload(SSSensor.sensor_type_obj))
+            .options(
+                selectinload(SSSensor.sensor_type_obj),
+                selectinload(SSSensor.limits),
+                selectinload(SSSensor.selected_limit),
+            )
         )
-        return result.scalars().first()
 
-    async def get_sensor_type(self, sensor_id: str, db: AsyncSession) -> Optional[str]:
-        """Get sensor type with caching"""
-        now = datetime.now(timezone.utc)
-        cached = self._sensor_cache.get(sensor_id)
-        if cached and now - cached["ts"] < self._cache_timeout and cached.get("type"):
-            return cached["type"]
-
-        try:
-            sensor = await self._get_sensor(sensor_id, db)
-            sensor_type = (
-                sensor.sensor_type_obj.name
-                if sensor and sensor.sensor_type_obj
-                else None
+    def _build_entry(self, sensor: Optional[SSSensor]) -> Dict:
+        """Flatten a loaded sensor (or a miss) into a sensor cache entry"""
+        entry = {
+            "db_id": None,  # ss_sensors primary key, what SSAlert.sensor_id references
+            "pattern": None,
+            "is_active": None,
+            "type": None,
+            "all_limits": None,
+            "selected_limit_name": None,
+            "selected_limit_config": None,
+            # (limit name, unit, upper, lower) of the selected limit for alerts
+            "check": None,
+            # (upper, lower) alert message templates, indexed by alert_type == "lower"
+            "messages": None,
+        }
+
+        if sensor:
+            entry["db_id"] = sensor.id
+            entry["pattern"] = sensor.pattern
+            entry["is_active"] = sensor.is_active
+
+        # Type and limits are only served for active sensors
+        if sensor and sensor.is_active:
+            entry["type"] = (
+                sensor.sensor_type_obj.name if sensor.sensor_type_obj else None
             )
+            entry["all_limits"] = {
+                limit.name: {
+                    "selected": limit.is_selected,
+                    "upper": limit.upper_limit,
+                    "lower": limit.lower_limit,
+                    "unit": limit.unit,
+                }
+                for limit in sensor.limits
+            }
 
-            if cached:
-                cached["type"] = sensor_type
-                cached["ts"] = now
-            else:
-                self._sensor_cache[sensor_id] = {"type": sensor_type, "ts": now}
+            selected_limit = sensor.selected_limit
+            if selected_limit:
+                entry["selected_limit_name"] = selected_limit.name
+                entry["selected_limit_config"] = {
+                    "upper": selected_limit.upper_limit,
+                    "lower": selected_limit.lower_limit,
+                    "unit": selected_limit.unit,
+                    "selected": selected_limit.is_selected,
+                }
+                entry["check"] = (
+                    selected_limit.name,
+                    # Interned like AlertCheck.unit, so matches are pointer-equal
+                    sys.intern(selected_limit.unit),
+                    selected_limit.upper_limit,
+                    selected_limit.lower_limit,
+                )
+                sid = sensor.sensor_id.replace("{", "{{").replace("}", "}}")
+                entry["messages"] = (
+                    f"Sensor {sid} exceeded upper limit: {{value}}{{unit}} > {{limit}}{{unit}}",
+                    f"Sensor {sid} below lower limit: {{value}}{{unit}} < {{limit}}{{unit}}",
+                )
 
-            return sensor_type
-        except Exception as e:
+        return entry
+
+    async def _hydrate_sensors(
+        self, sensor_ids: List[str], db: AsyncSession
+    ) -> Dict[str, Dict]:
+        """Load sensors with their type and limits in one query and cache them"""
+        sensors = await db.scalars(
+            select(SSSensor)
+            .where(SSSensor.sensor_id.in_(sensor_ids))
+            .options(
+                selectinload(SSSensor.sensor_type_obj),
+                selectinload(SSSensor.limits),
+                selectinload(SSSensor.selected_limit),
+            )
+        )
+        by_id = {sensor.sensor_id: sensor for sensor in sensors}
+
+        entries = {}
+        for sensor_id in sensor_ids:
+            entry = self._build_entry(by_id.get(sensor_id))
+            self._sensor_cache[sensor_id] = entry
+            entries[sensor_id] = entry
+        return entries
+
+    async def _hydrate_sensor(self, sensor_id: str, db: AsyncSession) -> Dict:
+        """Load a sensor with its type and limits once and cache every field"""
+        entries = await self._hydrate_sensors([sensor_id], db)
+        return entries[sensor_id]
+
+    async def _get_sensor_entry(self, sensor_id: str, db: AsyncSession) -> Dict:
+        """Get the cached sensor entry, hydrating it when missing or expired"""
+        entry = self._sensor_cache.get(sensor_id)
+        if entry is None:
+            entry = await self._hydrate_sensor(sensor_id, db)
+        return entry
+
+    async def get_sensor_type(self, sensor_id: str, db: AsyncSession) -> Optional[str]:
+        """Get sensor type with caching"""
+        try:
+            entry = await self._get_sensor_entry(sensor_id, db)
+        except DB_ERRORS as e:
             logger.error(f"Error getting sensor type for {sensor_id}: {e}")
             return None
+        return entry["type"]
 
     async def get_sensor_activeness(
         self, sensor_id: str, db: AsyncSession
     ) -> Optional[bool]:
         """Get sensor activeness status with caching"""
-        now = datetime.now(timezone.utc)
-        cached = self._sensor_cache.get(sensor_id)
-        if (
-            cached
-            and now - cached["ts"] < self._cache_timeout
-            and "is_active" in cached
-        ):
-            return cached["is_active"]
-
         try:
-            result = await db.execute(
-                select(SSSensor).where(SSSensor.sensor_id == sensor_id)
-            )
-            sensor = result.scalars().first()
-            is_active = sensor.is_active if sensor else None
-
-            if cached:
-                cached["is_active"] = is_active
-                cached["ts"] = now
-            else:
-                self._sensor_cache[sensor_id] = {"is_active": is_active, "ts": now}
-
-            return is_active
-        except Exception as e:
+            entry = await self._get_sensor_entry(sensor_id, db)
+        except DB_ERRORS as e:
             logger.error(f"Error getting sensor activeness for {sensor_id}: {e}")
             return None
+        return entry["is_active"]
 
     async def get_all_sensor_limits(
         self, sensor_id: str, db: AsyncSession
     ) -> Optional[Dict]:
         """Get all limit configurations for a sensor with caching"""
-        now = datetime.now(timezone.utc)
-        cached = self._sensor_cache.get(sensor_id)
-        if (
-            cached
-            and now - cached["ts"] < self._cache_timeout
-            and cached.get("all_limits")
-        ):
-            return cached["all_limits"]
-
         try:
-            sensor = await self._get_sensor(sensor_id, db)
-            limits = None
-
-            if sensor:
-                limits = {}
-                result = await db.execute(
-                    select(SSSensorLimit).where(SSSensorLimit.sensor_id == sensor.id)
-                )
-                sensor_limits = result.scalars().all()
-
-                for limit in sensor_limits:
-                    limits[limit.name] = {
-                        "selected": limit.is_selected,
-                        "upper": limit.upper_limit,
-                        "lower": limit.lower_limit,
-                        "unit": limit.unit,
-                    }
-
-            if cached:
-                cached["all_limits"] = limits
-                cached["ts"] = now
-            else:
-                self._sensor_cache[sensor_id] = {"all_limits": limits, "ts": now}
-
-            return limits
-        except Exception as e:
+            entry = await self._get_sensor_entry(sensor_id, db)
+        except DB_ERRORS as e:
             logger.error(f"Error getting sensor limits for {sensor_id}: {e}")
             return None
+        return entry["all_limits"]
 
     async def get_sensor_limit_config(
         self, sensor_id: str, db: AsyncSession
     ) -> Tuple[Optional[str], Optional[Dict]]:
         """Get the selected limit configuration for a sensor with caching"""
-        now = datetime.now(timezone.utc)
-        cached = self._sensor_cache.get(sensor_id)
-        if (
-            cached
-            and now - cached["ts"] < self._cache_timeout
-            and cached.get("selected_limit_name") is not None
-        ):
-            return cached["selected_limit_name"], cached.get("selected_limit_config")
-
         try:
-            sensor = await self._get_sensor(sensor_id, db)
-            limit_name, limit_config = None, None
-
-            if sensor:
-                result = await db.execute(
-                    select(SSSensorLimit).where(
-                        and_(
-                            SSSensorLimit.sensor_id == sensor.id,
-                            SSSensorLimit.is_selected == True,
-                        )
-                    )
-                )
-                selected_limit = result.scalars().first()
-
-                if selected_limit:
-                    limit_name = selected_limit.name
-                    limit_config = {
-                        "upper": selected_limit.upper_limit,
-                        "lower": selected_limit.lower_limit,
-                        "unit": selected_limit.unit,
-                        "selected": selected_limit.is_selected,
-                    }
-
-            if cached:
-                cached["selected_limit_name"] = limit_name
-                cached["selected_limit_config"] = limit_config
-                cached["ts"] = now
-            else:
-                self._sensor_cache[sensor_id] = {
-                    "selected_limit_name": limit_name,
-                    "selected_limit_config": limit_config,
-                    "ts": now,
-                }
-
-            return limit_name, limit_config
-        except Exception as e:
+            entry = await self._get_sensor_entry(sensor_id, db)
+        except DB_ERRORS as e:
             logger.error(f"Error getting sensor limit config for {sensor_id}: {e}")
             return None, None
+        return entry["selected_limit_name"], entry["selected_limit_config"]
+
+    def _evaluate_limit(
+        self, sensor_id: str, entry: Dict, value: float, unit: str
+    ) -> Optional[Tuple[str, float]]:
+        """Return (alert type, limit value) when a value violates the selected limit"""
+        check = entry["check"]
+
+        if check is None:
+            logger.warning(f"Sensor {sensor_id} not found or no limit config in SS")
+            return None
+
+        if not self.config.alerts_enabled:
+            return None
+
+        limit_name, limit_unit, upper, lower = check
+
+        # Check if unit matches
+        if unit is not limit_unit and unit != limit_unit:
+            logger.warning(
+                f"Sensor limit unit for {sensor_id} does not match the unit in {limit_name} config in SS"
+            )
+            return None
+
+        # Check value against limits
+        if value > upper:
+            logger.warning(
+                f"Alert: Sensor value is greater than the upper limit for {sensor_id}"
+            )
+            return "upper", upper
+        if value < lower:
+            logger.warning(
+                f"Alert: Sensor value is lower than the lower limit for {sensor_id}"
+            )
+            return "lower", lower
+        return None
+
+    def _alert_row(
+        self,
+        sensor_id: str,
+        entry: Dict,
+        value: float,
+        unit: str,
+        alert_type: str,
+        limit_value: float,
+    ) -> Dict[str, Any]:
+        """Build the SSAlert column values for a limit violation"""
+        return {
+            "sensor_id": entry["db_id"],
+            "alert_type": alert_type,
+            "triggered_value": value,
+            "limit_value": limit_value,
+            "unit": unit,
+            "message": entry["messages"][alert_type == "lower"].format(
+                value=value, unit=unit, limit=limit_value
+            ),
+            "is_resolved": False,
+            "mqtt_topic": entry["pattern"],
+            "raw_data": {
+                "sensor_id": sensor_id,
+                "value": value,
+                "unit": unit,
+            },
+        }
 
     async def check_limit_for_alert(
         self, sensor_id: str, value: float, unit: str, db: AsyncSession
     ) -> Tuple[bool, Optional[str]]:
         """Check if a sensor value violates limits and should trigger an alert"""
         try:
-            # Get selected limit configuration from cache
-            limit_name, limit_config = await self.get_sensor_limit_config(sensor_id, db)
-
-            if not limit_config:
-                logger.warning(f"Sensor {sensor_id} not found or no limit config in SS")
+            # Get the precomputed selected limit check from cache
+            entry = await self._get_sensor_entry(sensor_id, db)
+            violation = self._evaluate_limit(sensor_id, entry, value, unit)
+            if violation is None:
                 return False, None
 
-            # Check if alerts are enabled
-            alerts_enabled = (
-                self._config_cache.get("enable_alerts", "true").lower() == "true"
+            alert_type, limit_value = violation
+
+            # Queue the alert record built from the cached sensor row
+            row = self._alert_row(
+                sensor_id, entry, value, unit, alert_type, limit_value
             )
-            if not alerts_enabled:
-                return False, None
+            self._alert_writer.put(row)
 
-            # Check if unit matches
-            if unit != limit_config["unit"]:
-                logger.warning(
-                    f"Sensor limit unit for {sensor_id} does not match the unit in {limit_name} config in SS"
-                )
-                return False, None
+            logger.warning(f"Alert triggered: {row['message']}")
 
-            # Check value against limits
-            alert_triggered = False
-            alert_type = None
+            return True, alert_type
 
-            if value > limit_config["upper"]:
-                alert_triggered = True
-                alert_type = "upper"
-                logger.warning(
-                    f"Alert: Sensor value is greater than the upper limit for {sensor_id}"
-                )
-            elif value < limit_config["lower"]:
-                alert_triggered = True
-                alert_type = "lower"
-                logger.warning(
-                    f"Alert: Sensor value is lower than the lower limit for {sensor_id}"
-                )
+        except DB_ERRORS as e:
+            logger.error(f"Error checking limits for {sensor_id}: {e}")
+            return False, None
 
-            if alert_triggered:
-                # Get sensor for alert creation
-                sensor = await self._get_sensor(sensor_id, db)
-                if sensor:
-                    # Create alert record
-                    limit_value = (
-                        limit_config["upper"]
-                        if alert_type == "upper"
-                        else limit_config["lower"]
-                    )
+    async def check_limits_batch(
+        self, checks: List[Tuple[str, float, str]], db: AsyncSession
+    ) -> List[Tuple[bool, Optional[str]]]:
+        """Check many (sensor_id, value, unit) readings, queueing any alerts"""
+        try:
+            # Hydrate every uncached sensor of the batch in one query
+            missing = list(
+                {
+                    sensor_id
+                    for sensor_id, _, _ in checks
+                    if sensor_id not in self._sensor_cache
+                }
+            )
+            hydrated = await self._hydrate_sensors(missing, db) if missing else {}
 
-                    alert = SSAlert(
-                        sensor_id=sensor.id,
-                        alert_type=alert_type,
-                        triggered_value=value,
-                        limit_value=limit_value,
-                        unit=unit,
-                        message=(
-                            f"Sensor {sensor_id} exceeded {alert_type} limit: {value}{unit} > {limit_value}{unit}"
-                            if alert_type == "upper"
-                            else f"Sensor {sensor_id} below {alert_type} limit: {value}{unit} < {limit_value}{unit}"
-                        ),
-                        is_resolved=False,
-                        mqtt_topic=sensor.pattern,
-                        raw_data={
-                            "sensor_id": sensor_id,
-                            "value": value,
-                            "unit": unit,
-                        },
+            results = []
+            alert_rows = []
+            for sensor_id, value, unit in checks:
+                entry = hydrated.get(sensor_id) or await self._get_sensor_entry(
+                    sensor_id, db
+                )
+                violation = self._evaluate_limit(sensor_id, entry, value, unit)
+                if violation is None:
+                    results.append((False, None))
+                    continue
+
+                alert_type, limit_value = violation
+                alert_rows.append(
+                    self._alert_row(
+                        sensor_id, entry, value, unit, alert_type, limit_value
                     )
+                )
+                results.append((True, alert_type))
+
+            if alert_rows:
+                # Queued like single checks, written by the background writer
+                for row in alert_rows:
+                    self._alert_writer.put(row)
+                logger.warning(f"Alerts triggered: {len(alert_rows)} in batch")
+
+            return results
+
+        except DB_ERRORS as e:
+            logger.error(f"Error checking limits for batch: {e}")
+            return [(False, None)] * len(checks)
+
+    async def _insert_limits(
+        self, sensor_pk: int, limits: List, db: AsyncSession
+    ) -> Optional[int]:
+        """Insert a sensor's limit configurations in one executemany
+
+        Returns the id of the selected limit, if any, for SSSensor.selected_limit_id
+        """
+        rows = []
+        for limit_data in limits:
+            limit_dict = (
+                limit_data.dict() if hasattr(limit_data, "dict") else limit_data
+            )
+            rows.append(
+                {
+                    "sensor_id": sensor_pk,
+                    "name": limit_dict.get("name", "default"),
+                    "upper_limit": float(limit_dict["upper_limit"]),
+                    "lower_limit": float(limit_dict["lower_limit"]),
+                    "unit": limit_dict["unit"],
+                    "is_selected": bool(limit_dict.get("is_selected", False)),
+                }
+            )
+        if not rows:
+            return None
 
-                    db.add(alert)
-                    await db.flush()
-
-                    logger.warning(f"Alert triggered: {alert.message}")
-
-            return alert_triggered, alert_type
-
-        except Exception as e:
-            logger.error(f"Error checking limits for {sensor_id}: {e}")
-            return False, None
+        result = await db.execute(
+            insert(SSSensorLimit).returning(
+                SSSensorLimit.id, SSSensorLimit.is_selected
+            ),
+            rows,
+        )
+        return next((pk for pk, is_selected in result if is_selected), None)
 
     async def add_sensor(
         self,
@@ -334,48 +498,36 @@ class DatabaseSSManager:
         """Add a new sensor to SS"""
         try:
             # Check if sensor already exists
-            result = await db.execute(
-                select(SSSensor).where(SSSensor.sensor_id == sensor_id)
-            )
-            existing = result.scalars().first()
-            if existing:
+            if await db.scalar(select(exists().where(SSSensor.sensor_id == sensor_id))):
                 raise ValueError(f"Sensor {sensor_id} already exists")
 
             # Get sensor type
-            result = await db.execute(
-                select(SSSensorType).where(SSSensorType.name == sensor_type)
+            sensor_type_pk = await db.scalar(
+                select(SSSensorType.id).where(SSSensorType.name == sensor_type)
             )
-            sensor_type_obj = result.scalars().first()
-            if not sensor_type_obj:
+            if sensor_type_pk is None:
                 raise ValueError(f"Sensor type {sensor_type} not found")
 
-            # Create sensor
-            sensor = SSSensor(
-                sensor_id=sensor_id,
-                pattern=pattern,
-                sensor_type_id=sensor_type_obj.id,
-                is_active=active,
+            # Create sensor, taking its id from RETURNING instead of a flush
+            sensor_pk = await db.scalar(
+                insert(SSSensor)
+                .values(
+                    sensor_id=sensor_id,
+                    pattern=pattern,
+                    sensor_type_id=sensor_type_pk,
+                    is_active=active,
+                )
+                .returning(SSSensor.id)
             )
-            db.add(sensor)
-            await db.flush()
 
             # Add limits
-            for limit_data in limits:
-                limit_dict = (
-                    limit_data.dict() if hasattr(limit_data, "dict") else limit_data
-                )
-
-                limit = SSSensorLimit(
-                    sensor_id=sensor.id,
-                    name=limit_dict.get("name", "default"),
-                    upper_limit=float(limit_dict["upper_limit"]),
-                    lower_limit=float(limit_dict["lower_limit"]),
-                    unit=limit_dict["unit"],
-                    is_selected=bool(limit_dict.get("is_selected", False)),
+            selected_limit_pk = await self._insert_limits(sensor_pk, limits, db)
+            if selected_limit_pk is not None:
+                await db.execute(
+                    update(SSSensor)
+                    .where(SSSensor.id == sensor_pk)
+                    .values(selected_limit_id=selected_limit_pk)
                 )
-                db.add(limit)
-
-            await db.flush()
 
             # Clear cache for this sensor
             self._sensor_cache.pop(sensor_id, None)
@@ -389,10 +541,9 @@ class DatabaseSSManager:
     async def remove_sensor(self, sensor_id: str, db: AsyncSession):
         """Remove sensor from SS (soft delete)"""
         try:
-            result = await db.execute(
+            sensor = await db.scalar(
                 select(SSSensor).where(SSSensor.sensor_id == sensor_id)
             )
-            sensor = result.scalars().first()
             if sensor:
                 sensor.is_active = False
                 await db.flush()
@@ -419,10 +570,9 @@ class DatabaseSSManager:
         """Update sensor configuration"""
         try:
             # Fetch sensor
-            result = await db.execute(
+            sensor = await db.scalar(
                 select(SSSensor).where(SSSensor.sensor_id == sensor_id)
             )
-            sensor = result.scalars().first()
             if not sensor:
                 raise ValueError(f"Sensor {sensor_id} not found")
 
@@ -434,40 +584,21 @@ class DatabaseSSManager:
                 sensor.is_active = active
 
             if sensor_type is not None:
-                result = await db.execute(
-                    select(SSSensorType).where(SSSensorType.name == sensor_type)
+                sensor_type_pk = await db.scalar(
+                    select(SSSensorType.id).where(SSSensorType.name == sensor_type)
                 )
-                st = result.scalars().first()
-                if st:
-                    sensor.sensor_type_id = st.id
+                if sensor_type_pk is not None:
+                    sensor.sensor_type_id = sensor_type_pk
 
             # Update limits
             if limits is not None:
-                # Remove existing limits
-                result = await db.execute(
-                    select(SSSensorLimit).where(SSSensorLimit.sensor_id == sensor.id)
+                # Replace existing limits
+                await db.execute(
+                    delete(SSSensorLimit).where(SSSensorLimit.sensor_id == sensor.id)
+                )
+                sensor.selected_limit_id = await self._insert_limits(
+                    sensor.id, limits, db
                 )
-                existing_limits = result.scalars().all()
-
-                for l in existing_limits:
-                    await db.delete(l)
-
-                # Insert new limits
-                for limit_data in limits:
-                    limit_dict = (
-                        limit_data.dict() if hasattr(limit_data, "dict") else limit_data
-                    )
-
-                    new_limit = SSSensorLimit(
-                        sensor_id=sensor.id,
-                        name=limit_dict.get("name", "default"),
-                        upper_limit=float(limit_dict["upper_limit"]),
-                        lower_limit=float(limit_dict["lower_limit"]),
-                        unit=limit_dict["unit"],
-                        is_selected=bool(limit_dict.get("is_selected", False)),
-                    )
-
-                    db.add(new_limit)
 
             await db.flush()
 
@@ -483,24 +614,11 @@ class DatabaseSSManager:
     async def get_ss_info(self, db: AsyncSession) -> Dict:
         """Get SS configuration info"""
         try:
-            # Count sensors
-            result = await db.execute(
-                select(SSSensor).where(SSSensor.is_active == True)
-            )
-            total_sensors = len(result.scalars().all())
-
-            # Count types
-            result = await db.execute(select(SSSensorType))
-            total_types = len(result.scalars().all())
-
-            # Count active alerts
-            result = await db.execute(
-                select(SSAlert).where(SSAlert.is_resolved == False)
-            )
-            active_alerts = len(result.scalars().all())
+            # Count sensors, types and active alerts
+            total_sensors, total_types, active_alerts = await self._count_summary(db)
 
             return {
-                "version": self._config_cache.get("version", "unknown"),
+                "version": self.config.version,
                 "total_sensors": total_sensors,
                 "total_types": total_types,
                 "active_alerts": active_alerts,
@@ -510,7 +628,7 @@ class DatabaseSSManager:
                 "storage": "database",
                 "alerts_enabled": self._config_cache.get("enable_alerts", "true"),
             }
-        except Exception as e:
+        except DB_ERRORS as e:
             logger.error(f"Error getting SS info: {e}")
             return {
                 "version": "unknown",
@@ -531,15 +649,8 @@ class DatabaseSSManager:
             if not sensor:
                 return None
 
-            # Get limits
-            result = await db.execute(
-                select(SSSensorLimit).where(SSSensorLimit.sensor_id == sensor.id)
-            )
-            limits = result.scalars().all()
-
-            selected_limit = next(
-                (limit for limit in limits if limit.is_selected), None
-            )
+            limits = sensor.limits
+            selected_limit = sensor.selected_limit
 
             return {
                 "sensor_id": sensor_id,
@@ -558,87 +669,72 @@ class DatabaseSSManager:
                     limit.to_dict(include_relationships=False) for limit in limits
                 ],
             }
-        except Exception as e:
+        except DB_ERRORS as e:
             logger.error(f"Error getting sensor info for {sensor_id}: {e}")
             return None
 
     async def get_all_sensors(
         self, check_activeness: bool, db: AsyncSession
     ) -> List[Dict]:
-        """Get all sensors"""
+        """Get all sensors as plain rows, datetimes are left for orjson to encode"""
         try:
-            query = select(SSSensor)
+            query = select(*SENSOR_LIST_COLUMNS).outerjoin(
+                SSSensorType, SSSensorType.id == SSSensor.sensor_type_id
+            )
             if check_activeness:
                 query = query.where(SSSensor.is_active == True)
-            query = query.options(
-                selectinload(SSSensor.sensor_type_obj),
-                selectinload(SSSensor.limits),
-                selectinload(SSSensor.alerts),
-            )
-            result = await db.execute(query)
-            sensors = result.scalars().all()
+            sensor_rows = (await db.execute(query)).all()
+            sensor_pks = [row.id for row in sensor_rows]
+
+            limits_by_sensor = defaultdict(list)
+            limits_by_id = {}
+            alerts_by_sensor = defaultdict(list)
+            if sensor_pks:
+                result = await db.execute(
+                    select(SSSensorLimit.sensor_id, *LIMIT_LIST_COLUMNS).where(
+                        SSSensorLimit.sensor_id.in_(sensor_pks)
+                    )
+                )
+                for row in result:
+                    limit = dict(row._mapping)
+                    limits_by_sensor[limit.pop("sensor_id")].append(limit)
+                    limits_by_id[limit["id"]] = limit
+
+                result = await db.execute(
+                    select(*ALERT_LIST_COLUMNS).where(SSAlert.sensor_id.in_(sensor_pks))
+                )
+                for row in result:
+                    alerts_by_sensor[row.sensor_id].append(dict(row._mapping))
 
             sensor_list = []
-            for sensor in sensors:
-                limits = sensor.limits if hasattr(sensor, "limits") else []
-                alerts = sensor.alerts if hasattr(sensor, "alerts") else []
-                selected_limit = next((l for l in limits if l.is_selected), None)
-
-                sensor_dict = {
-                    "id": sensor.id,
-                    "sensor_id": sensor.sensor_id,
-                    "pattern": sensor.pattern,
-                    "sensor_type": (
-                        sensor.sensor_type_obj.name
-                        if sensor.sensor_type_obj
-                        else "unknown"
-                    ),
-                    "is_active": sensor.is_active,
-                    "limits": [
-                        limit.to_dict(include_relationships=False) for limit in limits
-                    ],
-                    "selected_limit": (
-                        selected_limit.to_dict(include_relationships=False)
-                        if selected_limit
-                        else None
-                    ),
-                    "alerts": [
-                        alert.to_dict(include_relationships=False) for alert in alerts
-                    ],
-                    "created_at": (
-                        sensor.created_at.isoformat() if sensor.created_at else None
-                    ),
-                    "updated_at": (
-                        sensor.updated_at.isoformat() if sensor.updated_at else None
-                    ),
-                }
+            for row in sensor_rows:
+                sensor_dict = dict(row._mapping)
+                selected_limit_pk = sensor_dict.pop("selected_limit_id")
+                sensor_dict["limits"] = limits_by_sensor.get(row.id, [])
+                sensor_dict["selected_limit"] = limits_by_id.get(selected_limit_pk)
+                sensor_dict["alerts"] = alerts_by_sensor.get(row.id, [])
                 sensor_list.append(sensor_dict)
 
             return sensor_list
-        except Exception as e:
+        except DB_ERRORS as e:
             logger.error(f"Error getting all sensors:\n{traceback.format_exc()}")
             return []
 
     async def get_all_sensor_types(self, db: AsyncSession) -> Dict[str, Dict]:
         """Get all sensor types with caching"""
-        now = datetime.now(timezone.utc)
-        if (
-            self._type_cache
-            and self._type_cache_ts
-            and now - self._type_cache_ts < self._cache_timeout
-        ):
-            return self._type_cache
+        types_by_name = self._type_cache.get("all")
+        if types_by_name is not None:
+            return types_by_name
 
         try:
-            result = await db.execute(select(SSSensorType))
-            types = result.scalars().all()
-            self._type_cache = {
+            types = (await db.scalars(select(SSSensorType))).all()
+            types_by_name = {
                 type_obj.name: type_obj.to_dict(include_relationships=False)
                 for type_obj in types
             }
-            self._type_cache_ts = now
-            return self._type_cache
-        except Exception as e:
+            self._type_cache["all"] = types_by_name
+            return types_by_name
+        except DB_ERRORS as e:
             logger.error(f"Error getting all sensor types: {e}")
             return {}
 
@@ -649,26 +745,24 @@ class DatabaseSSManager:
         try:
             query = (
                 select(SSAlert)
-                .options(selectinload(SSAlert.sensor))
+                .options(*ALERT_RELATIONSHIPS)
                 .order_by(SSAlert.triggered_at.desc())
             )
             if limit != 0:
                 query = query.limit(limit)
             if not include_resolved:
                 query = query.where(SSAlert.is_resolved == False)
-            result = await db.execute(query)
-            alerts = result.scalars().all()
+            alerts = (await db.scalars(query)).all()
 
             return [alert.to_dict(include_relationships=True) for alert in alerts]
-        except Exception as e:
+        except DB_ERRORS as e:
             logging.error(f"Error in get_alerts:\n{traceback.format_exc()}")
             return []
 
     async def resolve_alert(self, alert_id: int, db: AsyncSession):
         """Mark an alert as resolved"""
         try:
-            result = await db.execute(select(SSAlert).where(SSAlert.id == alert_id))
-            alert = result.scalars().first()
+            alert = await db.get(SSAlert, alert_id)
             if alert:
                 if not alert.is_resolved:
                     alert.is_resolved = True
@@ -686,8 +780,7 @@ class DatabaseSSManager:
     async def revert_alert(self, alert_id: int, db: AsyncSession):
         """Revert an alert resolve"""
         try:
-            result = await db.execute(select(SSAlert).where(SSAlert.id == alert_id))
-            alert = result.scalars().first()
+            alert = await db.get(SSAlert, alert_id)
             if alert:
                 if alert.is_resolved:
                     alert.is_resolved = False
@@ -717,5 +810,6 @@ async def init_ss_manager() -> DatabaseSSManager:
     global ss_manager
     ss_manager = DatabaseSSManager()
     await ss_manager._load_config()
+    ss_manager.start()
     logger.info("Async database-backed SS manager initialized")
     return ss_manager
@@ -4,6 +4,7 @@ Database models for ACL (Access Control List) management
 
 from sqlalchemy import (
     Column,
+    Index,
     String,
     Text,
     DateTime,
@@ -11,11 +12,25 @@ from sqlalchemy import (
     ForeignKey,
     Integer,
     JSON,
+    insert,
+    inspect,
 )
+from cachetools import LRUCache
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func, select
 from app.database import Base
-from typing import List, Dict, Any
+from app.security.auth_security import hash_password
+from typing import List, Dict, Any, Optional, Tuple
+import secrets
+
+# (user id, user updated_at, ((role id, role updated_at), ...)) -> permissions.
+# updated_at is bumped by every UPDATE, so a changed user or role gets a new key
+# and stale versions just age out of the LRU.
+_permission_cache: LRUCache = LRUCache(maxsize=10_000)
+
+# key -> value snapshot of acl_config, None until loaded or after invalidation
+_config_dict: Optional[Dict[str, str]] = None
 
 
 class ACLRole(Base):
@@ -24,13 +39,23 @@ class ACLRole(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(50), unique=True, index=True, nullable=False)
     description = Column(Text)
-    permissions = Column(JSON)  # Store permissions as JSON
+    permissions = Column(JSONB)  # Store permissions as JSON
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     users = relationship("ACLUser", secondary="acl_user_roles", back_populates="roles")
 
+    # GIN index for "which roles grant X" (permissions @> ...)
+    __table_args__ = (
+        Index(
+            "idx_acl_roles_permissions",
+            "permissions",
+            postgresql_using="gin",
+            postgresql_ops={"permissions": "jsonb_path_ops"},
+        ),
+    )
+
     def to_dict(self, include_relationships=True):
         result = {
             "id": self.id,
@@ -63,7 +88,7 @@ class ACLUser(Base):
     hashed_password = Column(String(256), nullable=False)
     is_active = Column(Boolean, default=True)
     is_superuser = Column(Boolean, default=False)
-    custom_permissions = Column(JSON)  # Store custom permissions as JSON
+    custom_permissions = Column(JSONB)  # Store custom permissions as JSON
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     last_login = Column(DateTime(timezone=True))
@@ -77,6 +102,16 @@ class ACLUser(Base):
     # Relationships
     roles = relationship("ACLRole", secondary="acl_user_roles", back_populates="users")
 
+    # GIN index for "which users have a custom X" (custom_permissions @> ...)
+    __table_args__ = (
+        Index(
+            "idx_acl_users_custom_permissions",
+            "custom_permissions",
+            postgresql_using="gin",
+            postgresql_ops={"custom_permissions": "jsonb_path_ops"},
+        ),
+    )
+
     def to_dict(self, include_relationships=True):
         result = {
             "id": self.id,
@@ -108,7 +143,39 @@ class ACLUser(Base):
         return result
 
     def get_all_permissions(self) -> List[Dict[str, Any]]:
-        """Get all permissions from roles and custom permissions"""
+        """Get all permissions from roles and custom permissions, cached per version"""
+        key = self.permissions_version()
+        if key is None:
+            return self._collect_permissions()
+
+        permissions = _permission_cache.get(key)
+        if permissions is None:
+            permissions = _permission_cache[key] = tuple(self._collect_permissions())
+        return list(permissions)
+
+    def permissions_version(self) -> Optional[Tuple]:
+        """Cache key for the loaded user and roles, None if it can't be trusted"""
+        # Read the already loaded state only, an expired updated_at would
+        # otherwise trigger a refresh. Unflushed changes have no version yet.
+        state = inspect(self)
+        if (
+            state.modified
+            or "updated_at" not in state.dict
+            or "roles" not in state.dict
+        ):
+            return None
+
+        roles = []
+        for role in self.roles:
+            role_state = inspect(role)
+            if role_state.modified or "updated_at" not in role_state.dict:
+                return None
+            roles.append((role.id, role.updated_at))
+
+        return (self.id, self.updated_at, tuple(roles))
+
+    def _collect_permissions(self) -> List[Dict[str, Any]]:
+        """Concatenate role permissions and custom permissions"""
         permissions = []
 
         # Add role permissions
@@ -176,10 +243,19 @@ class ACLConfig(Base):
         }
 
     @classmethod
-    def get_config_dict(cls, db):
-        """Get all configuration as a dictionary"""
-        configs = db.query(cls).all()
-        return {config.key: config.value for config in configs}
+    async def get_config_dict(cls, db, refresh: bool = False) -> Dict[str, str]:
+        """Get all configuration as a dictionary, cached until invalidated"""
+        global _config_dict
+        if _config_dict is None or refresh:
+            result = await db.execute(select(cls.key, cls.value))
+            _config_dict = dict(result.all())
+        return _config_dict
+
+    @staticmethod
+    def invalidate_config_dict():
+        """Drop the cached configuration, the next get_config_dict reloads it"""
+        global _config_dict
+        _config_dict = None
 
 
 class ACLAuditLog(Base):
@@ -260,14 +336,12 @@ async def create_default_roles(db):
         },
     ]
 
-    for role_data in default_roles:
-        result = await db.execute(
-            select(ACLRole).where(ACLRole.name == role_data["name"])
-        )
-        existing = result.scalars().first()
-        if not existing:
-            role = ACLRole(**role_data)
-            db.add(role)
+    # One statement, roles that already exist are left untouched
+    await db.execute(
+        pg_insert(ACLRole)
+        .values(default_roles)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
 
     await db.commit()
 
@@ -282,43 +356,69 @@ async def create_default_acl_users(db):
         {"username": "eve", "roles": ["device_owner"]},
         {"username": "erkam", "roles": ["admin"]},
     ]
-
-    for user_data in default_users:
-        # Check if user exists
+    default_custom_permissions = {
+        "bob": [{"pattern": "sf/sensors/room1/#", "allow": ["subscribe", "publish"]}],
+        "eve": [{"pattern": "sf/sensors/special/#", "allow": ["subscribe", "publish"]}],
+    }
+
+    # Load the default users that already exist in a single query
+    result = await db.execute(
+        select(ACLUser).where(
+            ACLUser.username.in_([u["username"] for u in default_users])
+        )
+    )
+    users_by_name = {u.username: u for u in result.scalars()}
+
+    # Load all role ids once
+    result = await db.execute(select(ACLRole.name, ACLRole.id))
+    roles_by_name = dict(result.all())
+
+    # Create missing users with one multi-row INSERT .. RETURNING, which only
+    # returns the rows it inserted. Seeded users get an unusable random
+    # password; hashed_password is NOT NULL so they need one.
+    missing = [u for u in default_users if u["username"] not in users_by_name]
+    if missing:
+        seed_password_hash = hash_password(secrets.token_urlsafe(32))
         result = await db.execute(
-            select(ACLUser).where(ACLUser.username == user_data["username"])
+            pg_insert(ACLUser)
+            .values(
+                [
+                    {
+                        "username": user_data["username"],
+                        "hashed_password": seed_password_hash,
+                        "is_active": True,
+                        "custom_permissions": default_custom_permissions.get(
+                            user_data["username"]
+                        ),
+                    }
+                    for user_data in missing
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["username"])
+            .returning(ACLUser.id, ACLUser.username)
         )
-        existing = result.scalars().first()
-        if existing:
-            continue
-
-        # Create user
-        user = ACLUser(username=user_data["username"], is_active=True)
-        db.add(user)
-        await db.flush()  # Get generated ID
-
-        # Assign roles
-        for role_name in user_data["roles"]:
-            result = await db.execute(select(ACLRole).where(ACLRole.name == role_name))
-            role = result.scalars().first()
-            if role:
-                user.roles.append(role)
-
-    # Custom permissions — Bob
-    result = await db.execute(select(ACLUser).where(ACLUser.username == "bob"))
-    bob = result.scalars().first()
-    if bob and not bob.custom_permissions:
-        bob.custom_permissions = [
-            {"pattern": "sf/sensors/room1/#", "allow": ["subscribe", "publish"]}
+        new_ids = {username: user_id for user_id, username in result}
+
+        # Then all of their role assignments with a second one
+        role_rows = [
+            {
+                "user_id": new_ids[user_data["username"]],
+                "role_id": roles_by_name[role_name],
+                "assigned_by": "system",
+            }
+            for user_data in missing
+            if user_data["username"] in new_ids
+            for role_name in user_data["roles"]
+            if role_name in roles_by_name
         ]
+        if role_rows:
+            await db.execute(insert(ACLUserRole), role_rows)
 
-    # Custom permissions — Eve
-    result = await db.execute(select(ACLUser).where(ACLUser.username == "eve"))
-    eve = result.scalars().first()
-    if eve and not eve.custom_permissions:
-        eve.custom_permissions = [
-            {"pattern": "sf/sensors/special/#", "allow": ["subscribe", "publish"]}
-        ]
+    # Existing users without custom permissions get the defaults
+    for username, permissions in default_custom_permissions.items():
+        user = users_by_name.get(username)
+        if user and not user.custom_permissions:
+            user.custom_permissions = permissions
 
     await db.commit()
 
@@ -344,13 +444,10 @@ async def create_default_acl_config(db):
         },
     ]
 
-    for config_data in default_configs:
-        result = await db.execute(
-            select(ACLConfig).where(ACLConfig.key == config_data["key"])
-        )
-        existing = result.scalars().first()
-
-        if not existing:
-            db.add(ACLConfig(**config_data))
+    await db.execute(
+        pg_insert(ACLConfig)
+        .values(default_configs)
+        .on_conflict_do_nothing(index_elements=["key"])
+    )
 
     await db.commit()
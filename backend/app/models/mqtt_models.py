@@ -13,7 +13,9 @@ from sqlalchemy import (
     JSON,
     Float,
     Index,
+    text,
 )
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func, select
 from app.database import Base
@@ -38,9 +40,20 @@ class MQTTDevice(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     meta_data = Column(JSON)  # Store additional device metadata
 
-    # Relationships
-    sensor_readings = relationship("MQTTSensorReading", back_populates="device")
-    commands = relationship("MQTTCommand", back_populates="device")
+    # Relationships, unbounded so never loaded implicitly (query the rows instead)
+    sensor_readings = relationship(
+        "MQTTSensorReading", back_populates="device", lazy="raise"
+    )
+    commands = relationship("MQTTCommand", back_populates="device", lazy="raise")
+
+    # Partial index for the active device list (ordered by name)
+    __table_args__ = (
+        Index(
+            "idx_devices_active_name",
+            "device_name",
+            postgresql_where=text("is_active = true"),
+        ),
+    )
 
     def to_dict(self, include_relationships=True):
         result = {
@@ -57,16 +70,8 @@ class MQTTDevice(Base):
             "meta_data": self.meta_data,
         }
 
-        if include_relationships:
-            result.update(
-                {
-                    "sensor_readings_count": (
-                        len(self.sensor_readings) if self.sensor_readings else 0
-                    ),
-                    "commands_count": len(self.commands) if self.commands else 0,
-                }
-            )
-
+        # Reading/command counts come from the aggregate device queries, the
+        # collections are unbounded and never loaded
         return result
 
 
@@ -77,13 +82,17 @@ class MQTTSensorReading(Base):
     device_id = Column(
         Integer, ForeignKey("mqtt_devices.id"), nullable=False, index=True
     )
+    # Device string id copied at insert time, so serializing needs no join
+    device_str_id = Column(String(100))
     sensor_id = Column(Integer, ForeignKey("ss_sensors.id"), nullable=False, index=True)
     sensor_type = Column(
         Integer, ForeignKey("ss_sensor_types.id"), nullable=False, index=True
     )
     value = Column(Float, nullable=False)
     unit = Column(String(20), nullable=False)
-    timestamp = Column(DateTime(timezone=True), nullable=False, index=True)
+    timestamp = Column(
+        DateTime(timezone=True), nullable=False, index=True, server_default=func.now()
+    )
     mqtt_topic = Column(String(200), nullable=False)
     qos = Column(Integer, default=1)
     retain = Column(Boolean, default=False)
@@ -92,15 +101,22 @@ class MQTTSensorReading(Base):
         Integer, ForeignKey("acl_users.id"), nullable=False, index=True
     )  # Who published this reading
 
-    # Relationships
-    device = relationship("MQTTDevice", back_populates="sensor_readings")
-    sensor = relationship("SSSensor")
-    sensor_type_obj = relationship("SSSensorType")
-    user = relationship("ACLUser")
+    # Relationships, raise on access unless loaded with selectinload/joinedload
+    device = relationship("MQTTDevice", back_populates="sensor_readings", lazy="raise")
+    sensor = relationship("SSSensor", lazy="raise")
+    sensor_type_obj = relationship("SSSensorType", lazy="raise")
+    user = relationship("ACLUser", lazy="raise")
 
     # Indexes for better query performance
     __table_args__ = (
-        Index("idx_sensor_readings_device_time", "device_id", "timestamp"),
+        # Covers "latest N readings of a device" index-only
+        Index(
+            "idx_sr_device_time_cover",
+            "device_id",
+            "timestamp",
+            postgresql_ops={"timestamp": "DESC"},
+            postgresql_include=["value", "unit", "sensor_type"],
+        ),
         Index("idx_sensor_readings_type_time", "sensor_type", "timestamp"),
         Index("idx_sensor_readings_user_time", "user_id", "timestamp"),
     )
@@ -125,7 +141,7 @@ class MQTTSensorReading(Base):
             result.update(
                 {
                     "device_name": self.device.device_name if self.device else None,
-                    "device_identifier": self.device.device_id if self.device else None,
+                    "device_identifier": self.device_str_id,
                     "sensor_identifier": self.sensor.sensor_id if self.sensor else None,
                     "sensor_pattern": self.sensor.pattern if self.sensor else None,
                     "sensor_type_name": (
@@ -145,8 +161,10 @@ class MQTTCommand(Base):
     device_id = Column(
         Integer, ForeignKey("mqtt_devices.id"), nullable=False, index=True
     )
+    # Device string id copied at insert time, so serializing needs no join
+    device_str_id = Column(String(100))
     command = Column(String(100), nullable=False)
-    parameters = Column(JSON)
+    parameters = Column(JSONB)
     status = Column(
         String(20), default="sent", index=True
     )  # "sent", "acknowledged", "executed", "failed"
@@ -162,9 +180,20 @@ class MQTTCommand(Base):
     response_data = Column(JSON)  # Store device response if any
     error_message = Column(Text)
 
-    # Relationships
-    device = relationship("MQTTDevice", back_populates="commands")
-    user = relationship("ACLUser")
+    # Relationships, raise on access unless loaded with selectinload/joinedload
+    device = relationship("MQTTDevice", back_populates="commands", lazy="raise")
+    user = relationship("ACLUser", lazy="raise")
+
+    # Indexes for better query performance, GIN for parameters @> ... lookups
+    __table_args__ = (
+        Index("idx_commands_device_sent", "device_id", "sent_at"),
+        Index(
+            "idx_commands_parameters",
+            "parameters",
+            postgresql_using="gin",
+            postgresql_ops={"parameters": "jsonb_path_ops"},
+        ),
+    )
 
     def to_dict(self, include_relationships=True):
         result = {
@@ -190,7 +219,7 @@ class MQTTCommand(Base):
             result.update(
                 {
                     "device_name": self.device.device_name if self.device else None,
-                    "device_identifier": self.device.device_id if self.device else None,
+                    "device_identifier": self.device_str_id,
                     "username": self.user.username if self.user else None,
                 }
             )
@@ -210,11 +239,31 @@ class MQTTSession(Base):
     last_activity = Column(DateTime(timezone=True), server_default=func.now())
     ip_address = Column(String(45))  # IPv4 or IPv6
     user_agent = Column(Text)
-    subscribed_topics = Column(JSON)  # Array of subscribed topics
+    subscribed_topics = Column(JSONB, default=list)  # Array of subscribed topics
     connection_metadata = Column(JSON)  # Additional connection info
 
     user = relationship("ACLUser")
 
+    # GIN index for "which sessions subscribe to X" (subscribed_topics @> ...),
+    # partial indexes for the active session list and close-by-client_id
+    __table_args__ = (
+        Index(
+            "idx_sessions_subscribed_topics",
+            "subscribed_topics",
+            postgresql_using="gin",
+        ),
+        Index(
+            "idx_sessions_active_connected",
+            "connected_at",
+            postgresql_where=text("is_active = true"),
+        ),
+        Index(
+            "idx_sessions_active_client",
+            "client_id",
+            postgresql_where=text("is_active = true"),
+        ),
+    )
+
     def to_dict(self, include_relationships=True):
         result = {
             "id": self.id,
@@ -286,7 +335,6 @@ class MQTTTopicStats(Base):
 
 async def create_default_mqtt_devices(db):
     """Create default MQTT devices for each sensor type if they don't exist"""
-    from sqlalchemy import select
 
     default_devices = [
         {
@@ -366,13 +414,11 @@ async def create_default_mqtt_devices(db):
         },
     ]
 
-    for device_data in default_devices:
-        result = await db.execute(
-            select(MQTTDevice).where(MQTTDevice.device_id == device_data["device_id"])
-        )
-        existing = result.scalars().first()
-        if not existing:
-            device = MQTTDevice(**device_data)
-            db.add(device)
+    # One statement, devices that already exist are left untouched
+    await db.execute(
+        pg_insert(MQTTDevice)
+        .values(default_devices)
+        .on_conflict_do_nothing(index_elements=["device_id"])
+    )
 
     await db.commit()
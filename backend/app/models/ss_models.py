@@ -12,7 +12,9 @@ from sqlalchemy import (
     Integer,
     JSON,
     Float,
+    Index,
 )
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func, select
 from app.database import Base
@@ -57,18 +59,43 @@ class SSSensor(Base):
     __tablename__ = "ss_sensors"
 
     id = Column(Integer, primary_key=True, index=True)
-    sensor_id = Column(String(100), unique=True, index=True, nullable=False)
+    sensor_id = Column(String(100), nullable=False)  # Unique, see __table_args__
     pattern = Column(String(200), nullable=False)  # MQTT topic pattern
     sensor_type_id = Column(Integer, ForeignKey("ss_sensor_types.id"), nullable=False)
     is_active = Column(Boolean, default=True)
+    # Denormalized pointer to the limit with is_selected set, kept in sync on writes
+    selected_limit_id = Column(
+        Integer,
+        ForeignKey(
+            "ss_sensor_limits.id",
+            use_alter=True,
+            name="fk_ss_sensors_selected_limit",
+            ondelete="SET NULL",
+        ),
+    )
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
     sensor_type_obj = relationship("SSSensorType", back_populates="sensors")
-    limits = relationship("SSSensorLimit", back_populates="sensor")
+    limits = relationship(
+        "SSSensorLimit", back_populates="sensor", foreign_keys="SSSensorLimit.sensor_id"
+    )
+    selected_limit = relationship(
+        "SSSensorLimit", foreign_keys=[selected_limit_id], post_update=True
+    )
     alerts = relationship("SSAlert", back_populates="sensor")
 
+    # Unique lookup index on sensor_id, covering the columns the hot paths read
+    __table_args__ = (
+        Index(
+            "idx_sensors_sensor_id_cover",
+            "sensor_id",
+            unique=True,
+            postgresql_include=["id", "is_active", "sensor_type_id", "pattern"],
+        ),
+    )
+
     def to_dict(self, include_relationships=True):
         result = {
             "id": self.id,
@@ -108,7 +135,7 @@ class SSSensor(Base):
 
     def get_selected_limit(self) -> Optional["SSSensorLimit"]:
         """Get the currently selected limit configuration"""
-        return next((limit for limit in self.limits if limit.is_selected), None)
+        return self.selected_limit
 
     def check_value_against_limits(
         self, value: float, unit: str
@@ -153,7 +180,13 @@ class SSSensorLimit(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Relationships
-    sensor = relationship("SSSensor", back_populates="limits")
+    sensor = relationship("SSSensor", back_populates="limits", foreign_keys=[sensor_id])
+
+    # Leading sensor_id serves the selectinload of a sensor's limits, the
+    # is_selected column resolves the selected limit from the same index
+    __table_args__ = (
+        Index("idx_sensor_limits_sensor_selected", "sensor_id", "is_selected"),
+    )
 
     def to_dict(self, include_relationships=True):
         result = {
@@ -287,14 +320,12 @@ async def create_default_sensor_types(db):
         },
     ]
 
-    for type_data in default_types:
-        result = await db.execute(
-            select(SSSensorType).where(SSSensorType.name == type_data["name"])
-        )
-        existing = result.scalars().first()
-        if not existing:
-            sensor_type = SSSensorType(**type_data)
-            db.add(sensor_type)
+    # One statement, types that already exist are left untouched
+    await db.execute(
+        pg_insert(SSSensorType)
+        .values(default_types)
+        .on_conflict_do_nothing(index_elements=["name"])
+    )
 
     await db.commit()
 
@@ -396,14 +427,16 @@ async def create_default_sensors(db):
         },
     ]
 
-    for sensor_data in default_sensors:
-        # Check if sensor already exists
-        result = await db.execute(
-            select(SSSensor).where(SSSensor.sensor_id == sensor_data["sensor_id"])
+    # Check which default sensors already exist in a single query
+    result = await db.execute(
+        select(SSSensor.sensor_id).where(
+            SSSensor.sensor_id.in_([s["sensor_id"] for s in default_sensors])
         )
-        existing = result.scalars().first()
+    )
+    existing = set(result.scalars())
 
-        if not existing:
+    for sensor_data in default_sensors:
+        if sensor_data["sensor_id"] not in existing:
             sensor_type_name = sensor_data["sensor_type_name"]
             sensor_type = sensor_types.get(sensor_type_name)
 
@@ -431,6 +464,8 @@ async def create_default_sensors(db):
                     is_selected=limit_data["is_selected"],
                 )
                 db.add(limit)
+                if limit.is_selected:
+                    sensor.selected_limit = limit
 
     await db.commit()
 
@@ -465,13 +500,10 @@ async def create_default_ss_config(db):
         },
     ]
 
-    for config_data in default_configs:
-        result = await db.execute(
-            select(SSConfig).where(SSConfig.key == config_data["key"])
-        )
-        existing = result.scalars().first()
-
-        if not existing:
-            db.add(SSConfig(**config_data))
+    await db.execute(
+        pg_insert(SSConfig)
+        .values(default_configs)
+        .on_conflict_do_nothing(index_elements=["key"])
+    )
 
     await db.commit()
@@ -1,6 +1,7 @@
 # app/mqtt/emqx_auth.py
 import httpx
 import logging
+import time
 from typing import Tuple, Optional
 from app.config import settings
 
@@ -23,6 +24,11 @@ class EMQXAuthManager:
         # EMQX 5.x API endpoints
         self.auth_endpoint = f"{self.api_url}/api/v5/authentication/password_based:built_in_database/users"
 
+        # Cached result of the last connection check
+        self._verify_ttl = 10.0
+        self._last_ok = False
+        self._last_ts = 0.0
+
         logger.info(f"EMQXAuthManager initialized with API URL: {self.api_url}")
 
     async def create_mqtt_user(
@@ -170,16 +176,26 @@ class EMQXAuthManager:
 
                 if response.status_code == 200:
                     logger.info("✅ EMQX API connection verified")
-                    return True
+                    ok = True
                 else:
                     logger.error(
                         f"❌ EMQX API connection failed: {response.status_code}"
                     )
-                    return False
+                    ok = False
 
         except Exception as e:
             logger.error(f"❌ Cannot connect to EMQX API: {str(e)}")
-            return False
+            ok = False
+
+        self._last_ok = ok
+        self._last_ts = time.monotonic()
+        return ok
+
+    async def verify_connection_cached(self) -> bool:
+        """Verify EMQX API connection, reusing a result younger than the TTL"""
+        if time.monotonic() - self._last_ts < self._verify_ttl:
+            return self._last_ok
+        return await self.verify_connection()
 
 
 # Global instance
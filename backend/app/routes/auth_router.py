@@ -11,6 +11,7 @@ from fastapi.security import OAuth2PasswordRequestForm, OAuth2PasswordBearer
 from app.database import get_db
 from app.models.acl_models import ACLUser
 from app.managers.db_auth_manager import get_auth_manager
+from app.managers.db_acl_manager import get_acl_manager
 from app.schemas.auth_schemas import UserCreate, UserOut, Token
 from app.security.auth_security import (
     hash_password,
@@ -54,6 +55,11 @@ async def register(user_in: UserCreate, db: AsyncSession = Depends(get_db)):
             # Assign 'viewer' role by default
             await auth.assign_default_role(new_user, "viewer", db)
 
+        # The name may have been cached as unknown by the ACL manager
+        acl = get_acl_manager()
+        if acl:
+            await acl.invalidate_user(user_in.username, db)
+
         # Commit the transaction
         await db.commit()
 
@@ -2,22 +2,19 @@
 Async MQTT API router with database storage for sensor data, commands, and device management
 """
 
-from fastapi import APIRouter, HTTPException, Depends, Query
-from sqlalchemy import select, func
+from fastapi import APIRouter, Body, HTTPException, Depends, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
-from datetime import datetime, timedelta, timezone
-from typing import Optional
+from datetime import datetime, timezone
+from typing import List, Optional
 import logging
+import orjson
 
 from fastapi.security import OAuth2PasswordBearer
 
-from app.models.mqtt_models import (
-    MQTTDevice,
-    MQTTSensorReading,
-    MQTTCommand,
-    MQTTSession,
-)
+from app.models.mqtt_models import MQTTSession
 from app.schemas.mqtt_schemas import (
     SensorDataRequest,
     CommandRequest,
@@ -28,7 +25,6 @@ from app.schemas.mqtt_schemas import (
     DeviceListResponse,
     DeviceWithStats,
     SensorReadingListResponse,
-    SensorReadingResponse,
     CommandListResponse,
     CommandResponse,
     SessionListResponse,
@@ -39,18 +35,25 @@ from app.schemas.mqtt_schemas import (
 from app.managers.db_mqtt_manager import (
     create_or_update_device,
     store_sensor_reading,
+    store_sensor_readings_bulk,
     store_command,
     update_command_status,
     create_mqtt_session,
     close_mqtt_session,
     get_device_by_id,
+    get_device_by_id_with_stats,
     get_all_devices,
     get_device_readings,
+    stream_device_readings,
+    get_recent_readings,
     get_recent_commands,
     get_device_commands,
     get_active_sessions,
+    get_mqtt_statistics as get_mqtt_statistics_data,
+    SESSION_RELATIONSHIPS,
 )
 from app.mqtt.client import get_mqtt_client
+from app.config import Settings, get_settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api/mqtt", tags=["MQTT"])
@@ -67,43 +70,8 @@ async def get_devices(
 ):
     """Get list of all devices with statistics"""
     try:
-        devices = await get_all_devices(db, active_only=active_only)
-        device_list = []
-
-        for device in devices:
-            # Get latest reading
-            latest_query = await db.execute(
-                select(MQTTSensorReading)
-                .where(MQTTSensorReading.device_id == device.id)
-                .order_by(MQTTSensorReading.timestamp.desc())
-                .limit(1)
-            )
-            latest = latest_query.scalars().first()
-
-            # Get reading count
-            count_query = await db.execute(
-                select(func.count(MQTTSensorReading.id)).where(
-                    MQTTSensorReading.device_id == device.id
-                )
-            )
-            reading_count = count_query.scalar()
-
-            # Get command count
-            cmd_count_query = await db.execute(
-                select(func.count(MQTTCommand.id)).where(
-                    MQTTCommand.device_id == device.id
-                )
-            )
-            command_count = cmd_count_query.scalar()
-
-            device_dict = device.to_dict(include_relationships=False)
-            device_dict["sensor_readings_count"] = reading_count or 0
-            device_dict["commands_count"] = command_count or 0
-            device_dict["latest_reading"] = (
-                latest.timestamp.isoformat() if latest else None
-            )
-
-            device_list.append(DeviceWithStats(**device_dict))
+        devices = await get_all_devices(db, active_only=active_only, include_stats=True)
+        device_list = [DeviceWithStats(**device_dict) for device_dict in devices]
 
         return DeviceListResponse(devices=device_list, count=len(device_list))
 
@@ -116,40 +84,10 @@ async def get_devices(
 async def get_device(device_id: str, db: AsyncSession = Depends(get_db)):
     """Get a specific device by ID"""
     try:
-        device = await get_device_by_id(db, device_id)
-        if not device:
+        device_dict = await get_device_by_id_with_stats(db, device_id)
+        if not device_dict:
             raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
 
-        # Get statistics
-        reading_count = (
-            await db.execute(
-                select(func.count(MQTTSensorReading.id)).where(
-                    MQTTSensorReading.device_id == device.id
-                )
-            )
-        ).scalar()
-
-        command_count = (
-            await db.execute(
-                select(func.count(MQTTCommand.id)).where(
-                    MQTTCommand.device_id == device.id
-                )
-            )
-        ).scalar()
-
-        latest_query = await db.execute(
-            select(MQTTSensorReading)
-            .where(MQTTSensorReading.device_id == device.id)
-            .order_by(MQTTSensorReading.timestamp.desc())
-            .limit(1)
-        )
-        latest = latest_query.scalars().first()
-
-        device_dict = device.to_dict(include_relationships=False)
-        device_dict["sensor_readings_count"] = reading_count or 0
-        device_dict["commands_count"] = command_count or 0
-        device_dict["latest_reading"] = latest.timestamp.isoformat() if latest else None
-
         return DeviceWithStats(**device_dict)
 
     except HTTPException:
@@ -227,24 +165,17 @@ async def update_device(
 @router.get("/readings", response_model=SensorReadingListResponse)
 async def get_latest_readings(
     limit: int = Query(20, ge=1, le=1000, description="Number of readings to return"),
+    before: Optional[datetime] = Query(
+        None, description="Only return items older than this (next-page cursor)"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """Get latest sensor readings across all devices"""
     try:
-        result = await db.execute(
-            select(MQTTSensorReading)
-            .order_by(MQTTSensorReading.timestamp.desc())
-            .limit(limit)
-        )
-        readings = result.scalars().all()
+        readings = await get_recent_readings(db, limit=limit, before=before)
 
-        return SensorReadingListResponse(
-            readings=[
-                SensorReadingResponse(**r.to_dict(include_relationships=True))
-                for r in readings
-            ],
-            count=len(readings),
-        )
+        # Rows already match SensorReadingResponse, orjson encodes them directly
+        return ORJSONResponse({"readings": readings, "count": len(readings)})
 
     except Exception as e:
         logger.error(f"Error getting latest readings: {e}")
@@ -257,19 +188,17 @@ async def get_latest_readings(
 async def get_device_sensor_readings(
     device_id: str,
     limit: int = Query(100, ge=1, le=1000, description="Number of readings to return"),
+    before: Optional[datetime] = Query(
+        None, description="Only return items older than this (next-page cursor)"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """Get sensor readings for a specific device"""
     try:
-        readings = await get_device_readings(db, device_id, limit=limit)
+        readings = await get_device_readings(db, device_id, limit=limit, before=before)
 
-        return SensorReadingListResponse(
-            readings=[
-                SensorReadingResponse(**r.to_dict(include_relationships=True))
-                for r in readings
-            ],
-            count=len(readings),
-        )
+        # Rows already match SensorReadingResponse, orjson encodes them directly
+        return ORJSONResponse({"readings": readings, "count": len(readings)})
 
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -280,6 +209,33 @@ async def get_device_sensor_readings(
         )
 
 
+@router.get("/devices/{device_id}/readings/export")
+async def export_device_sensor_readings(
+    device_id: str,
+    since: Optional[datetime] = Query(None, description="Oldest timestamp to include"),
+    before: Optional[datetime] = Query(
+        None, description="Only readings older than this"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """Stream all readings of a device as JSON lines, newest first"""
+    readings = stream_device_readings(db, device_id, since=since, before=before)
+    try:
+        # Pull the first reading now so an unknown device is still a 404
+        first = await anext(readings, None)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def lines():
+        if first is None:
+            return
+        yield orjson.dumps(first) + b"\n"
+        async for reading in readings:
+            yield orjson.dumps(reading) + b"\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
 @router.post("/readings", response_model=SuccessResponse)
 async def publish_sensor_reading(
     data: SensorDataRequest, db: AsyncSession = Depends(get_db)
@@ -310,6 +266,7 @@ async def publish_sensor_reading(
             qos=data.qos,
             retain=data.retain,
             timestamp=timestamp,
+            eager=True,
         )
         await db.commit()
 
@@ -345,17 +302,91 @@ async def publish_sensor_reading(
         )
 
 
+@router.post("/readings/batch", response_model=SuccessResponse)
+async def publish_sensor_readings_batch(
+    data: List[SensorDataRequest] = Body(
+        ..., min_length=1, max_length=1000, description="Readings to publish"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """Publish many sensor readings (stored with one bulk insert)"""
+    mqtt = get_mqtt_client()
+    if mqtt is None:
+        raise HTTPException(status_code=503, detail="MQTT client not initialized")
+
+    try:
+        now = datetime.now(timezone.utc)
+        readings = [
+            {
+                "device_id": d.device_id,
+                "sensor_id": d.sensor_id,
+                "sensor_type_id": d.sensor_type_id,
+                "value": d.value,
+                "unit": d.unit,
+                "topic": f"sf/sensors/{d.device_id}",
+                "user_id": d.user_id,
+                "raw_data": d.model_dump(),
+                "qos": d.qos,
+                "retain": d.retain,
+                "timestamp": (
+                    datetime.fromisoformat(d.timestamp.replace("Z", "+00:00"))
+                    if d.timestamp
+                    else now
+                ),
+            }
+            for d in data
+        ]
+
+        # Store in database
+        ids = await store_sensor_readings_bulk(db, readings)
+        await db.commit()
+
+        # Publish to MQTT
+        for r in readings:
+            mqtt.publish(
+                r["topic"],
+                {
+                    "device_id": r["device_id"],
+                    "sensor_id": r["sensor_id"],
+                    "sensor_type_id": r["sensor_type_id"],
+                    "value": r["value"],
+                    "unit": r["unit"],
+                    "timestamp": r["timestamp"].isoformat(),
+                },
+                qos=r["qos"],
+                retain=r["retain"],
+            )
+
+        return SuccessResponse(
+            message=f"{len(ids)} sensor readings published and stored successfully",
+            data={"ids": ids, "count": len(ids)},
+        )
+
+    except ValueError as e:
+        await db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error publishing sensor readings batch: {e}")
+        raise HTTPException(
+            status_code=500, detail=f"Failed to publish sensor readings: {str(e)}"
+        )
+
+
 # ============= COMMAND ENDPOINTS =============
 
 
 @router.get("/commands", response_model=CommandListResponse)
 async def get_commands(
     limit: int = Query(50, ge=1, le=500, description="Number of commands to return"),
+    before: Optional[datetime] = Query(
+        None, description="Only return items older than this (next-page cursor)"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """Get recent commands across all devices"""
     try:
-        commands = await get_recent_commands(db, limit=limit)
+        commands = await get_recent_commands(db, limit=limit, before=before)
 
         return CommandListResponse(
             commands=[
@@ -374,11 +405,14 @@ async def get_commands(
 async def get_device_command_history(
     device_id: str,
     limit: int = Query(50, ge=1, le=500, description="Number of commands to return"),
+    before: Optional[datetime] = Query(
+        None, description="Only return items older than this (next-page cursor)"
+    ),
     db: AsyncSession = Depends(get_db),
 ):
     """Get command history for a specific device"""
     try:
-        commands = await get_device_commands(db, device_id, limit=limit)
+        commands = await get_device_commands(db, device_id, limit=limit, before=before)
 
         return CommandListResponse(
             commands=[
@@ -419,6 +453,7 @@ async def send_device_command(
             user_id=command.user_id,
             qos=command.qos,
             retain=command.retain,
+            flush=True,
         )
         await db.commit()
 
@@ -456,6 +491,7 @@ async def update_command(
             status=update.status,
             response_data=update.response_data,
             error_message=update.error_message,
+            include_relationships=True,
         )
         await db.commit()
 
@@ -487,7 +523,9 @@ async def get_mqtt_sessions(
         if active_only:
             sessions = await get_active_sessions(db)
         else:
-            result = await db.execute(select(MQTTSession))
+            result = await db.execute(
+                select(MQTTSession).options(*SESSION_RELATIONSHIPS)
+            )
             sessions = result.scalars().all()
 
         return SessionListResponse(
@@ -515,6 +553,7 @@ async def create_session(session: SessionCreate, db: AsyncSession = Depends(get_
             user_agent=session.user_agent,
             subscribed_topics=session.subscribed_topics,
             connection_metadata=session.connection_metadata,
+            flush=True,
         )
         await db.commit()
 
@@ -563,71 +602,7 @@ async def close_session(session_id: int, db: AsyncSession = Depends(get_db)):
 async def get_mqtt_statistics(db: AsyncSession = Depends(get_db)):
     """Get MQTT system statistics"""
     try:
-        # Device counts
-        total_devices = (
-            await db.execute(select(func.count()).select_from(MQTTDevice))
-        ).scalar()
-
-        active_devices = (
-            await db.execute(select(func.count()).where(MQTTDevice.is_active == True))
-        ).scalar()
-
-        # Reading counts
-        total_readings = (
-            await db.execute(select(func.count()).select_from(MQTTSensorReading))
-        ).scalar()
-
-        since_24h = datetime.now(timezone.utc) - timedelta(hours=24)
-        readings_24h = (
-            await db.execute(
-                select(func.count()).where(MQTTSensorReading.timestamp >= since_24h)
-            )
-        ).scalar()
-
-        # Command counts
-        total_commands = (
-            await db.execute(select(func.count()).select_from(MQTTCommand))
-        ).scalar()
-
-        commands_24h = (
-            await db.execute(
-                select(func.count()).where(MQTTCommand.sent_at >= since_24h)
-            )
-        ).scalar()
-
-        # Active sessions
-        active_sessions = (
-            await db.execute(select(func.count()).where(MQTTSession.is_active == True))
-        ).scalar()
-
-        # Most active devices
-        result = await db.execute(
-            select(
-                MQTTDevice.device_id,
-                MQTTDevice.device_name,
-                func.count(MQTTSensorReading.id).label("reading_count"),
-            )
-            .join(MQTTSensorReading)
-            .group_by(MQTTDevice.device_id, MQTTDevice.device_name)
-            .order_by(func.count(MQTTSensorReading.id).desc())
-            .limit(5)
-        )
-
-        most_active = [
-            {"device_id": d, "device_name": n, "readings": c}
-            for d, n, c in result.all()
-        ]
-
-        return MQTTStatsResponse(
-            total_devices=total_devices or 0,
-            active_devices=active_devices or 0,
-            total_readings=total_readings or 0,
-            total_commands=total_commands or 0,
-            readings_24h=readings_24h or 0,
-            commands_24h=commands_24h or 0,
-            active_sessions=active_sessions or 0,
-            most_active_devices=most_active,
-        )
+        return MQTTStatsResponse(**await get_mqtt_statistics_data(db))
 
     except Exception as e:
         logger.error(f"Error getting MQTT statistics: {e}")
@@ -643,12 +618,12 @@ async def get_mqtt_statistics(db: AsyncSession = Depends(get_db)):
 async def get_mqtt_credentials(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db),
+    settings: Settings = Depends(get_settings),
 ):
     """Get MQTT credentials for the current authenticated user"""
 
     from app.routes.auth_router import get_current_user
     from app.security.mqtt_credentials import MQTTCredentialManager
-    from app.config import settings
 
     # Get current user
     current_user = await get_current_user(token, db)
@@ -2,9 +2,11 @@
 SS (Sensor Security) API routes with database integration
 """
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, Body, HTTPException, Depends
+from fastapi.responses import ORJSONResponse
 import traceback
 import logging
+from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.database import get_db
 from app.managers.db_ss_manager import get_ss_manager
@@ -42,7 +44,8 @@ async def get_all_sensors(
             raise HTTPException(status_code=503, detail="SS manager not available")
 
         sensors = await ss.get_all_sensors(check_activeness, db)
-        return sensors
+        # Rows hold raw datetimes, let orjson encode them without jsonable_encoder
+        return ORJSONResponse(content=sensors)
     except Exception as e:
         logger.error(f"Error in get_all_sensors:\n{traceback.format_exc()}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -98,9 +101,6 @@ async def check_alert(check: AlertCheck, db: AsyncSession = Depends(get_db)):
             check.sensor_id, float(check.value), check.unit, db
         )
 
-        # Commit the alert if one was created
-        await db.commit()
-
         if alert_triggered:
             ws_manager = get_websocket_manager()
             await ws_manager.broadcast_system_alert(
@@ -127,6 +127,55 @@ async def check_alert(check: AlertCheck, db: AsyncSession = Depends(get_db)):
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.post("/check/batch")
+async def check_alert_batch(
+    checks: List[AlertCheck] = Body(
+        ..., min_length=1, max_length=1000, description="Sensor data to check"
+    ),
+    db: AsyncSession = Depends(get_db),
+):
+    """Check a batch of sensor data for alerts"""
+    try:
+        ss = get_ss_manager()
+        if not ss:
+            raise HTTPException(status_code=503, detail="SS manager not available")
+
+        results = await ss.check_limits_batch(
+            [(check.sensor_id, float(check.value), check.unit) for check in checks],
+            db,
+        )
+
+        ws_manager = get_websocket_manager()
+        response = []
+        for check, (alert_triggered, alert_type) in zip(checks, results):
+            if alert_triggered:
+                await ws_manager.broadcast_system_alert(
+                    "warning",
+                    f"Sensor data from sensor {check.sensor_id} is outside of limits",
+                    {
+                        "sensor_id": check.sensor_id,
+                        "value": check.value,
+                        "unit": check.unit,
+                        "alert_type": alert_type,
+                    },
+                )
+            response.append(
+                {
+                    "sensor_id": check.sensor_id,
+                    "value": check.value,
+                    "unit": check.unit,
+                    "alert_triggered": alert_triggered,
+                    "alert_type": alert_type,
+                }
+            )
+
+        return response
+    except Exception as e:
+        await db.rollback()
+        logger.error(f"Error in check_alert_batch:\n{traceback.format_exc()}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # Sensor Management Endpoints
 @router.post("/sensors")
 async def add_sensor(sensor: AddSensor, db: AsyncSession = Depends(get_db)):
@@ -15,7 +15,7 @@ from app.mqtt.emqx_auth import get_emqx_auth_manager
 from app.websocket.manager import get_websocket_manager
 from app.security.auth_security import decode_access_token
 from app.routes.acl_router import get_user
-from app.database import get_db
+from app.database import get_db, SessionLocal
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -266,12 +266,13 @@ async def handle_user_message(
         acl_mgr = get_acl_manager()
         ss_mgr = get_ss_manager()
 
-        system_info = {
-            "type": "system_info",
-            "acl_info": await acl_mgr.get_acl_info() if acl_mgr else None,
-            "ss_info": await ss_mgr.get_ss_info() if ss_mgr else None,
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-        }
+        async with SessionLocal() as db:
+            system_info = {
+                "type": "system_info",
+                "acl_info": await acl_mgr.get_acl_info(db) if acl_mgr else None,
+                "ss_info": await ss_mgr.get_ss_info(db) if ss_mgr else None,
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+            }
 
         await websocket.send_text(json.dumps(system_info))
 
@@ -281,7 +282,9 @@ async def handle_user_message(
 
         acl_mgr = get_acl_manager()
         if acl_mgr:
-            await acl_mgr.reload()
+            async with SessionLocal() as db:
+                await acl_mgr.reload(db)
+                await db.commit()
             await websocket.send_text(
                 json.dumps(
                     {
@@ -304,7 +307,8 @@ async def handle_user_message(
 
         ss_mgr = get_ss_manager()
         if ss_mgr:
-            await ss_mgr.reload()
+            async with SessionLocal() as db:
+                await ss_mgr.reload(db)
             await websocket.send_text(
                 json.dumps(
                     {
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+import sys
+
+from pydantic import BaseModel, field_validator
 from typing import List, Optional, Dict, Any
 
 
@@ -7,6 +9,12 @@ class AlertCheck(BaseModel):
     value: str
     unit: str
 
+    @field_validator("unit")
+    @classmethod
+    def intern_unit(cls, v: str) -> str:
+        # Cached limit units are interned too, the limit check compares by identity
+        return sys.intern(v)
+
 
 class SensorLimit(BaseModel):
     id: Optional[int] = None